@@ -14,7 +14,7 @@ OUTPUT_FILE = os.path.join(DATA_DIR, "mentions.json")
 
 RAW_FILES = [
     "reddit_raw.json",
-    "twitter_raw.json",
+    "twitter_raw.jsonl",   # twitter_scraper appends NDJSON; legacy .json still read
     "playstore_raw.json",
     "appstore_raw.json",
 ]
@@ -60,13 +60,21 @@ def aggregate():
 
     for filename in RAW_FILES:
         path = os.path.join(DATA_DIR, filename)
+        if not os.path.exists(path) and filename.endswith(".jsonl"):
+            # Fall back to the whole-array layout from before the scraper
+            # switched to NDJSON
+            filename = filename[:-1]
+            path = os.path.join(DATA_DIR, filename)
         if not os.path.exists(path):
             print(f"[Aggregate] Skipping missing file: {filename}")
             continue
 
         with open(path, "r", encoding="utf-8") as f:
             try:
-                records = json.load(f)
+                if filename.endswith(".jsonl"):
+                    records = [json.loads(line) for line in f if line.strip()]
+                else:
+                    records = json.load(f)
             except json.JSONDecodeError:
                 print(f"[Aggregate] Failed to parse {filename}")
                 continue
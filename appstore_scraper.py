@@ -3,6 +3,7 @@ App Store Scraper — fetches reviews for Matiks on iOS.
 Uses app-store-scraper library.
 Output: data/appstore_raw.json
 """
+import hashlib
 import json
 import os
 from datetime import datetime
@@ -24,10 +25,14 @@ def scrape():
     matiks.review(how_many=100)
     
     records = []
+    scraped_at = datetime.now().isoformat()   # one call per run, not per review
     for r in matiks.reviews:
-        # Convert to our schema
+        # Convert to our schema.
+        # blake2b, not builtin hash(): hash() is salted per process, so ids
+        # would change every run and defeat the enrichment cache downstream.
+        review_key = (r["userName"] + str(r["date"])).encode("utf-8")
         record = {
-            "id": f"ios_{hash(r['userName'] + str(r['date']))}",
+            "id": f"ios_{hashlib.blake2b(review_key, digest_size=8).hexdigest()}",
             "platform": "appstore",
             "title": r.get("title", ""),
             "text": r.get("review", ""),
@@ -35,12 +40,13 @@ def scrape():
             "score": r.get("rating", 0),
             "version": r.get("version", ""),
             "created_utc": r.get("date").isoformat() if isinstance(r.get("date"), datetime) else str(r.get("date")),
-            "scraped_at": datetime.now().isoformat(),
+            "scraped_at": scraped_at,
         }
         records.append(record)
     
+    # Machine-read only — compact output halves the bytes written
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
+        json.dump(records, f, ensure_ascii=False, separators=(",", ":"))
         
     print(f"[App Store] Done. Fetched {len(records)} reviews.")
 
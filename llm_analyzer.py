@@ -19,16 +19,46 @@ Output: data/mentions_enriched.json
         data/critical_alerts.json
         data/word_cloud.json
         data/weekly_digest.txt (Sundays only)
+
+Performance note: when aiohttp is installed, Ollama batches are fired
+concurrently (OLLAMA_NUM_PARALLEL at a time). For this to actually run in
+parallel server-side, start Ollama with:
+    OLLAMA_NUM_PARALLEL=4 OLLAMA_MAX_LOADED_MODELS=1 ollama serve
 """
+import asyncio
+import hashlib
 import json
 import os
 import re
+import sqlite3
 import time
 import datetime
 import urllib.request
 import urllib.error
+from collections import Counter
 from typing import List, Dict, Optional
 
+try:
+    import aiohttp          # optional — enables concurrent Ollama batches
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson           # optional — C JSON encoder for the big output files
+except ImportError:
+    orjson = None
+
+try:
+    import ijson            # optional — streaming reads of the big input files
+except ImportError:
+    ijson = None
+
+try:
+    import requests as _requests   # optional — pooled keep-alive connections
+    from requests.adapters import HTTPAdapter as _HTTPAdapter
+except ImportError:
+    _requests = None
+
 # ── Config ────────────────────────────────────────────────────────────────────
 CONFIG_FILE     = "/data/config.env"
 INPUT_FILE      = "/data/data/mentions.json"
@@ -37,12 +67,15 @@ ALERTS_FILE     = "/data/data/critical_alerts.json"
 DIGEST_FILE     = "/data/data/weekly_digest.txt"
 WORD_CLOUD_FILE = "/data/data/word_cloud.json"
 CHECKPOINT_FILE = "/data/data/.enrichment_checkpoint.json"   # NEW: progress saver
+LLM_CACHE_DB    = "/data/data/llm_cache.db"   # text-hash → LLM verdict cache
 
 # Ollama settings (local LLM — preferred, no rate limits)
 OLLAMA_URL   = "http://host.docker.internal:11434"   # from inside Docker
 OLLAMA_MODEL = "llama3.2:3b"                          # fits on RTX 4050 6GB
 
 # Gemini fallback settings
+# (explicit context caching needs a >=1024-token prefix — our rubric is ~400,
+# so the cheaper model wins; implicit prefix caching still applies)
 GEMINI_MODEL = "gemini-2.0-flash-lite"
 
 BATCH_SIZE    = 5      # smaller batches = fewer tokens lost on failure
@@ -53,6 +86,12 @@ RELEVANCE_MIN = 7      # posts scoring below this → marked irrelevant
 OLLAMA_RETRIES = 3     # retry attempts for Ollama network errors
 OLLAMA_TIMEOUT = 180   # seconds — generous for slow models
 
+# How many requests to keep in flight at once (matches ollama serve's
+# OLLAMA_NUM_PARALLEL — requests beyond the server's limit just queue).
+# With one record per request, Ollama's continuous batching folds concurrent
+# requests into the same GPU step, so higher parallelism pays off.
+OLLAMA_NUM_PARALLEL = int(os.environ.get("OLLAMA_NUM_PARALLEL", "8"))
+
 VALID_TOPICS = {
     "bug_report", "feature_request", "praise",
     "question", "competitor_comparison", "general", "irrelevant",
@@ -79,6 +118,47 @@ def load_config() -> Dict[str, str]:
 
 # ── LLM backends ─────────────────────────────────────────────────────────────
 
+# One pooled session for all sync HTTP — avoids paying the TCP (+TLS for
+# Gemini) handshake on every single call, which dominates for short prompts.
+if _requests is not None:
+    _SESSION = _requests.Session()
+    _adapter = _HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0)
+    _SESSION.mount("http://", _adapter)
+    _SESSION.mount("https://", _adapter)
+    _SESSION.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip"})
+else:
+    _SESSION = None
+
+
+def _post_json(url: str, body: Dict, timeout: int) -> Dict:
+    """POST a JSON body and parse the JSON reply. Uses the pooled keep-alive
+    session when requests is installed, else falls back to one-shot urllib."""
+    if _SESSION is not None:
+        resp = _SESSION.post(url, json=body, timeout=timeout)
+        resp.raise_for_status()
+        return resp.json()
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def _http_error_info(exc: Exception):
+    """Return (status_code, body_text) for urllib / requests HTTP errors,
+    or (None, '') if exc isn't an HTTP error."""
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code, exc.read().decode("utf-8", errors="ignore")
+    if _requests is not None and isinstance(exc, _requests.HTTPError):
+        resp = exc.response
+        if resp is not None:
+            return resp.status_code, resp.text
+    return None, ""
+
+
 def check_ollama() -> bool:
     """Return True if Ollama is reachable AND the required model is available."""
     try:
@@ -105,26 +185,100 @@ def check_ollama() -> bool:
         return False
 
 
-def call_ollama(prompt: str) -> str:
+class _JsonTracker:
+    """Incremental bracket/brace balance tracker.
+
+    Fed token-by-token from a streamed Ollama response; reports True as soon
+    as the first top-level JSON array/object closes, so we can abort the
+    stream instead of waiting for trailing filler tokens.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.done = False
+
+    def feed(self, chunk: str) -> bool:
+        if self.done:
+            return True
+        for c in chunk:
+            if self.escape:
+                self.escape = False
+                continue
+            if self.in_string:
+                if c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                continue
+            if c == '"':
+                self.in_string = True
+            elif c in "[{":
+                self.depth += 1
+                self.started = True
+            elif c in "]}":
+                self.depth -= 1
+                if self.started and self.depth <= 0:
+                    self.done = True
+                    return True
+        return False
+
+
+def _ollama_generate_stream(body: Dict, expect_json: bool = False) -> str:
+    """Stream /api/generate. With expect_json, stop as soon as the JSON
+    payload is complete — prose output (the digest) must stream to done,
+    since any balanced [..]/{..} in it would trip the tracker early."""
+    body = dict(body, stream=True)
+    url = f"{OLLAMA_URL}/api/generate"
+    buf: List[str] = []
+    tracker = _JsonTracker() if expect_json else None
+
+    if _SESSION is not None:
+        with _SESSION.post(url, json=body, timeout=OLLAMA_TIMEOUT, stream=True) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                token = chunk.get("response", "")
+                buf.append(token)
+                if (tracker is not None and tracker.feed(token)) or chunk.get("done"):
+                    break
+        return "".join(buf)
+
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=OLLAMA_TIMEOUT) as resp:
+        for line in resp:
+            line = line.strip()
+            if not line:
+                continue
+            chunk = json.loads(line)
+            token = chunk.get("response", "")
+            buf.append(token)
+            if (tracker is not None and tracker.feed(token)) or chunk.get("done"):
+                break
+    return "".join(buf)
+
+
+def call_ollama(prompt: str, expect_json: bool = False) -> str:
     """Call local Ollama with retries on transient errors."""
-    body = json.dumps({
+    body = {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
         "stream": False,
         "options": {"temperature": 0.1, "num_predict": 1024},
-    }).encode("utf-8")
-    req = urllib.request.Request(
-        f"{OLLAMA_URL}/api/generate",
-        data=body,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+    }
     last_exc: Optional[Exception] = None
     for attempt in range(1, OLLAMA_RETRIES + 1):
         try:
-            with urllib.request.urlopen(req, timeout=OLLAMA_TIMEOUT) as resp:
-                result = json.loads(resp.read().decode("utf-8"))
-                return result["response"]
+            return _ollama_generate_stream(body, expect_json=expect_json)
         except Exception as exc:
             last_exc = exc
             wait = 5 * attempt
@@ -133,38 +287,67 @@ def call_ollama(prompt: str) -> str:
     raise RuntimeError(f"Ollama: all {OLLAMA_RETRIES} attempts failed — last error: {last_exc}")
 
 
+async def call_ollama_async(session, prompt: str, expect_json: bool = False) -> str:
+    """Async twin of call_ollama — shares one aiohttp session across batches."""
+    body = {
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": True,
+        "options": {"temperature": 0.1, "num_predict": 1024},
+    }
+    last_exc: Optional[Exception] = None
+    for attempt in range(1, OLLAMA_RETRIES + 1):
+        try:
+            buf: List[str] = []
+            tracker = _JsonTracker() if expect_json else None
+            async with session.post(f"{OLLAMA_URL}/api/generate", json=body) as resp:
+                async for line in resp.content:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    token = chunk.get("response", "")
+                    buf.append(token)
+                    if (tracker is not None and tracker.feed(token)) or chunk.get("done"):
+                        break
+            return "".join(buf)
+        except Exception as exc:
+            last_exc = exc
+            wait = 5 * attempt
+            print(f"\n  [Ollama] Attempt {attempt}/{OLLAMA_RETRIES} failed: {exc}. Retrying in {wait}s...", flush=True)
+            await asyncio.sleep(wait)
+    raise RuntimeError(f"Ollama: all {OLLAMA_RETRIES} attempts failed — last error: {last_exc}")
+
+
 def call_gemini(api_key: str, prompt: str) -> str:
     """POST to Gemini generateContent endpoint, return text response."""
     url = (
         f"https://generativelanguage.googleapis.com/v1beta/models/"
         f"{GEMINI_MODEL}:generateContent?key={api_key}"
     )
-    body = json.dumps({
+    body = {
         "contents": [{"parts": [{"text": prompt}]}],
         "generationConfig": {"temperature": 0.1, "maxOutputTokens": 1024},
-    }).encode("utf-8")
-    req = urllib.request.Request(
-        url, data=body,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
+    }
     for attempt in range(4):
         try:
-            with urllib.request.urlopen(req, timeout=30) as resp:
-                result = json.loads(resp.read().decode("utf-8"))
-                return result["candidates"][0]["content"]["parts"][0]["text"]
-        except urllib.error.HTTPError as e:
-            body_text = e.read().decode("utf-8", errors="ignore")
-            if e.code == 429 and attempt < 3:
+            result = _post_json(url, body, timeout=30)
+            return result["candidates"][0]["content"]["parts"][0]["text"]
+        except Exception as e:
+            code, body_text = _http_error_info(e)
+            if code is None:
+                raise
+            if code == 429 and attempt < 3:
                 wait = 60 * (attempt + 1)
                 print(f"\n  [rate-limit] 429 — waiting {wait}s before retry {attempt+1}/3...", flush=True)
                 time.sleep(wait)
                 continue
-            raise RuntimeError(f"Gemini HTTP {e.code}: {str(body_text)[:300]}")
+            raise RuntimeError(f"Gemini HTTP {code}: {str(body_text)[:300]}")
     raise RuntimeError("Gemini: max retries exceeded")
 
 
-def call_llm(prompt: str, api_key: Optional[str], use_ollama: bool) -> str:
+def call_llm(prompt: str, api_key: Optional[str], use_ollama: bool,
+             expect_json: bool = False) -> str:
     """
     Unified dispatcher with automatic fallback:
       Ollama → try Ollama; if it raises, fall back to Gemini if key is set.
@@ -172,7 +355,7 @@ def call_llm(prompt: str, api_key: Optional[str], use_ollama: bool) -> str:
     """
     if use_ollama:
         try:
-            return call_ollama(prompt)
+            return call_ollama(prompt, expect_json=expect_json)
         except Exception as ollama_err:
             if api_key:
                 print(f"\n  [LLM] Ollama failed ({ollama_err}). Falling back to Gemini...", flush=True)
@@ -185,16 +368,68 @@ def call_llm(prompt: str, api_key: Optional[str], use_ollama: bool) -> str:
 
 # ── Prompt builders ───────────────────────────────────────────────────────────
 
+_URL_RE = re.compile(r"https?://\S+")
+_WS_RE  = re.compile(r"\s+")
+
+
+def _condense(s: str) -> str:
+    """Drop URLs and collapse whitespace runs — they cost prompt tokens
+    without carrying any signal for the classifier."""
+    return _WS_RE.sub(" ", _URL_RE.sub("", s)).strip()
+
+# Static rubric — kept as a strict prompt *prefix*, byte-identical across
+# batches: Gemini's implicit prefix caching and llama.cpp's KV cache (Ollama)
+# only reuse a prefix that matches exactly, so nothing batch-dependent (not
+# even the batch size) may appear before the Posts block.
+PROMPT_RUBRIC = """You are a brand relevance classifier for "Matiks" — an IIT Guwahati startup's math puzzle mobile game.
+
+CORE CONTEXT:
+1. Matiks is a math/brain training app with puzzles, streaks, and levels.
+2. Founded by IIT Guwahati alumni.
+3. IGNORE EVERYTHING ELSE: "Matiks" in Tagalog/Filipino means "automatic" (cars, bikes, transmission).
+4. DELETE ANY POST about Rap Battles, atheism, Philippines politics, or motorcycles. These are 0% relevant.
+
+RELEVANCE SCORING (0-10):
+- 10: Explicitly about the math app, puzzles, IIT, or app store feedback.
+- 7-9: Mentions "Matiks" app in a general gaming or productivity context.
+- 3-6: Ambiguous mentions.
+- 0-2: Definitely motorcycles, cars, Tagalog slang, rap battles, or atheist posts.
+
+Return a JSON array with one object per numbered post, in post order:
+- "relevance": integer 0-10
+- "topic": bug_report | feature_request | praise | question | competitor_comparison | general | irrelevant
+  (If relevance < 7, topic MUST be "irrelevant")
+- "llm_sentiment": very_negative | negative | mixed | positive | very_positive
+- "key_phrases": array of 3 meaningful phrases
+- "is_critical": true ONLY if topic=bug_report AND llm_sentiment=very_negative
+
+Return ONLY the raw JSON array, no explanation, no markdown fences.
+"""
+
+
 def build_batch_prompt(batch: List[Dict]) -> str:
     items = []
     for i, r in enumerate(batch):
-        text = (r.get("title", "") + " " + r.get("text", "")).strip()
+        text = _condense(r.get("title", "") + " " + r.get("text", ""))
         text = text[:MAX_TEXT_LEN]
         platform = r.get("platform", "unknown")
         items.append(f'{i+1}. [platform={platform}] """{text}"""')
 
     records_block = "\n".join(items)
 
+    return PROMPT_RUBRIC + f"\nPosts:\n{records_block}\n"
+
+
+def build_single_prompt(record: Dict) -> str:
+    """One record per prompt — used on the concurrent Ollama path.
+
+    Single-object responses sidestep the token-budget cliff that truncates
+    5-way JSON arrays (and the partial-recovery parsing that follows).
+    """
+    text = _condense(record.get("title", "") + " " + record.get("text", ""))
+    text = text[:MAX_TEXT_LEN]
+    platform = record.get("platform", "unknown")
+
     return f"""You are a brand relevance classifier for "Matiks" — an IIT Guwahati startup's math puzzle mobile game.
 
 CORE CONTEXT:
@@ -209,7 +444,7 @@ RELEVANCE SCORING (0-10):
 - 3-6: Ambiguous mentions.
 - 0-2: Definitely motorcycles, cars, Tagalog slang, rap battles, or atheist posts.
 
-For each numbered post, return a JSON array of {len(batch)} objects:
+Return a single JSON object for the post below:
 - "relevance": integer 0-10
 - "topic": bug_report | feature_request | praise | question | competitor_comparison | general | irrelevant
   (If relevance < 7, topic MUST be "irrelevant")
@@ -217,10 +452,10 @@ For each numbered post, return a JSON array of {len(batch)} objects:
 - "key_phrases": array of 3 meaningful phrases
 - "is_critical": true ONLY if topic=bug_report AND llm_sentiment=very_negative
 
-Return ONLY the raw JSON array, no explanation, no markdown fences.
+Return ONLY the raw JSON object, no explanation, no markdown fences.
 
-Posts:
-{records_block}
+Post:
+[platform={platform}] \"\"\"{text}\"\"\"
 """
 
 
@@ -233,10 +468,7 @@ def build_digest_prompt(records: List[Dict], since_date: str) -> str:
     def fmt(lst):
         return "\n".join(f"- {(r.get('title') or r.get('text',''))[:120]}" for r in lst) or "None"
 
-    platform_counts: Dict[str, int] = {}
-    for r in records:
-        p = r.get("platform", "unknown")
-        platform_counts[p] = platform_counts.get(p, 0) + 1
+    platform_counts = dict(Counter(r.get("platform", "unknown") for r in records))
 
     return f"""You are writing a weekly monitoring digest for "Matiks" — a math puzzle mobile app.
 
@@ -270,17 +502,55 @@ Write in plain text, no markdown, professional tone.
 
 # ── Result parser ─────────────────────────────────────────────────────────────
 
+# Compiled once — these run on every LLM response
+_FENCE_HEAD = re.compile(r"^```[a-z]*\n?", re.MULTILINE)
+_FENCE_TAIL = re.compile(r"\n?```$", re.MULTILINE)
+
+
+def _strip_fences(text: str) -> str:
+    return _FENCE_TAIL.sub("", _FENCE_HEAD.sub("", text.strip())).strip()
+
+
+def _iter_json_objects(s: str):
+    """Yield every balanced top-level {...} substring in one linear pass.
+
+    Tracks brace depth and string/escape state, so nested objects and arrays
+    (e.g. key_phrases) are recovered intact — unlike the old non-nesting regex.
+    """
+    depth = 0
+    start = -1
+    in_string = False
+    escape = False
+    for i, c in enumerate(s):
+        if escape:
+            escape = False
+            continue
+        if in_string:
+            if c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c == '"':
+            in_string = True
+        elif c == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == "}":
+            if depth > 0:
+                depth -= 1
+                if depth == 0 and start >= 0:
+                    yield s[start : i + 1]
+                    start = -1
+
+
 def parse_batch_response(response_text: str, batch_size: int) -> List[Dict]:
     """
     Extract JSON array from LLM response.
     Handles: markdown fences, leading prose, truncated arrays (partial recovery).
     """
-    text = response_text.strip()
-
-    # Strip markdown code fences
-    text = re.sub(r"^```[a-z]*\n?", "", text, flags=re.MULTILINE)
-    text = re.sub(r"\n?```$", "", text, flags=re.MULTILINE)
-    text = text.strip()
+    text = _strip_fences(response_text)
 
     # 1. Try direct parse
     try:
@@ -301,9 +571,9 @@ def parse_batch_response(response_text: str, batch_size: int) -> List[Dict]:
 
     # 3. Partial recovery: extract complete {...} objects one by one
     recovered = []
-    for m in re.finditer(r'\{[^{}]+\}', text, re.DOTALL):
+    for chunk in _iter_json_objects(text):
         try:
-            obj = json.loads(m.group())
+            obj = json.loads(chunk)
             recovered.append(obj)
         except json.JSONDecodeError:
             continue
@@ -318,6 +588,31 @@ def parse_batch_response(response_text: str, batch_size: int) -> List[Dict]:
     return [{}] * batch_size
 
 
+def parse_single_response(response_text: str) -> Dict:
+    """Extract a single JSON object from an LLM response (single-record path)."""
+    text = _strip_fences(response_text)
+
+    try:
+        parsed = json.loads(text)
+        if isinstance(parsed, dict):
+            return parsed
+        if isinstance(parsed, list) and parsed and isinstance(parsed[0], dict):
+            return parsed[0]
+    except json.JSONDecodeError:
+        pass
+
+    start = text.find("{")
+    end   = text.rfind("}") + 1
+    if start >= 0 and end > start:
+        try:
+            return json.loads(text[start:end])
+        except json.JSONDecodeError:
+            pass
+
+    print("  [LLM] Warning: could not parse single-record response — using defaults")
+    return {}
+
+
 def safe_enrich(record: Dict, llm_data: Dict) -> Dict:
     """Merge LLM output into record, sanitising all values defensively."""
     # Relevance — guard against None / non-numeric
@@ -348,6 +643,56 @@ def safe_enrich(record: Dict, llm_data: Dict) -> Dict:
     return record
 
 
+# ── On-disk LLM response cache ────────────────────────────────────────────────
+# The LLM verdict is a deterministic function of the prompt text, so identical
+# records (re-runs, re-scrapes, testing) never need a second network call.
+
+def _record_cache_key(record: Dict) -> str:
+    # NUL-delimited so ("ab", "c") and ("a", "bc") can't collide; platform
+    # is part of the prompt, so it's part of the key
+    raw = "\x00".join((
+        record.get("title", ""),
+        record.get("text", ""),
+        record.get("platform", ""),
+        str(MAX_TEXT_LEN),
+    ))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _open_llm_cache() -> Optional[sqlite3.Connection]:
+    try:
+        conn = sqlite3.connect(LLM_CACHE_DB)
+        conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, resp TEXT)")
+        conn.commit()
+        return conn
+    except Exception as e:
+        print(f"  [LLM] Response cache unavailable: {e}")
+        return None
+
+
+def _llm_cache_get(conn: Optional[sqlite3.Connection], key: str) -> Optional[Dict]:
+    if conn is None:
+        return None
+    try:
+        row = conn.execute("SELECT resp FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+    except Exception:
+        return None
+
+
+def _llm_cache_put(conn: Optional[sqlite3.Connection], key: str, llm_data: Dict) -> None:
+    if conn is None or not llm_data:
+        return
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, resp) VALUES (?, ?)",
+            (key, json.dumps(llm_data, ensure_ascii=False)),
+        )
+        conn.commit()
+    except Exception:
+        pass
+
+
 # ── Checkpointing ─────────────────────────────────────────────────────────────
 
 def load_checkpoint() -> Dict[str, Dict]:
@@ -362,10 +707,21 @@ def load_checkpoint() -> Dict[str, Dict]:
 
 
 def save_checkpoint(enriched_by_id: Dict[str, Dict]) -> None:
-    """Persist enriched records to checkpoint after every batch."""
+    """Persist enriched records to checkpoint after every batch.
+
+    Writes to a temp file and os.replace()s it into place so a crash mid-write
+    can never leave a torn checkpoint (which would defeat its whole purpose).
+    """
+    tmp = CHECKPOINT_FILE + ".tmp"
     try:
-        with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-            json.dump(enriched_by_id, f, ensure_ascii=False)
+        with open(tmp, "wb") as f:
+            if orjson is not None:
+                f.write(orjson.dumps(enriched_by_id))
+            else:
+                f.write(json.dumps(enriched_by_id, ensure_ascii=False).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, CHECKPOINT_FILE)
     except Exception as e:
         print(f"  [LLM] Checkpoint save failed: {e}")
 
@@ -379,6 +735,66 @@ def clear_checkpoint() -> None:
 
 # ── Main enrichment pipeline ──────────────────────────────────────────────────
 
+async def _process_batch(session, sem, batch: List[Dict], api_key: Optional[str]):
+    """Classify one batch. Never raises — failed batches get default values.
+
+    Returns a list of (enriched_record, raw_llm_data) pairs so the caller can
+    also feed the response cache.
+    """
+    single = len(batch) == 1
+    prompt = build_single_prompt(batch[0]) if single else build_batch_prompt(batch)
+    try:
+        async with sem:
+            try:
+                response = await call_ollama_async(session, prompt,
+                                                   expect_json=True)
+            except Exception as ollama_err:
+                if not api_key:
+                    raise
+                print(f"\n  [LLM] Ollama failed ({ollama_err}). Falling back to Gemini...", flush=True)
+                response = await asyncio.to_thread(call_gemini, api_key, prompt)
+        if single:
+            results = [parse_single_response(response)]
+        else:
+            results = parse_batch_response(response, len(batch))
+    except Exception as e:
+        print(f"  [LLM] Batch failed ✗ ({e})", flush=True)
+        results = [{}] * len(batch)
+
+    pairs = []
+    for i, record in enumerate(batch):
+        llm_data = results[i] if i < len(results) else {}
+        pairs.append((safe_enrich(dict(record), llm_data), llm_data))
+    return pairs
+
+
+async def _enrich_batches_async(
+    batches: List[List[Dict]],
+    enriched_by_id: Dict[str, Dict],
+    api_key: Optional[str],
+    cache_conn: Optional[sqlite3.Connection] = None,
+) -> None:
+    """Fire all batches concurrently (OLLAMA_NUM_PARALLEL in flight),
+    checkpointing as each one completes to preserve crash-safety."""
+    sem = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+    timeout = aiohttp.ClientTimeout(total=OLLAMA_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        tasks = [
+            asyncio.ensure_future(_process_batch(session, sem, b, api_key))
+            for b in batches
+        ]
+        done = 0
+        for fut in asyncio.as_completed(tasks):
+            pairs = await fut
+            for rec, llm_data in pairs:
+                enriched_by_id[rec.get("id", "")] = rec
+                _llm_cache_put(cache_conn, _record_cache_key(rec), llm_data)
+            done += 1
+            print(f"  Batch {done}/{len(batches)} done ✓", flush=True)
+            # Checkpoint after every completed batch — crash-safe
+            save_checkpoint(enriched_by_id)
+
+
 def enrich_records(
     records: List[Dict],
     api_key: Optional[str],
@@ -402,23 +818,63 @@ def enrich_records(
 
     enriched_by_id: Dict[str, Dict] = dict(checkpoint)  # id → enriched record
     still_to_do = [r for r in to_enrich if r.get("id") not in enriched_by_id]
+
+    # Exact-hit response cache: identical record text → reuse the stored
+    # verdict and skip the LLM entirely.
+    cache_conn = _open_llm_cache()
+    if cache_conn is not None and still_to_do:
+        misses = []
+        hits = 0
+        for r in still_to_do:
+            cached = _llm_cache_get(cache_conn, _record_cache_key(r))
+            if cached is not None:
+                enriched_by_id[r.get("id", "")] = safe_enrich(dict(r), cached)
+                hits += 1
+            else:
+                misses.append(r)
+        if hits:
+            print(f"[LLM] Response cache hits: {hits}")
+            save_checkpoint(enriched_by_id)
+        still_to_do = misses
+
     print(f"[LLM] Actually sending to LLM: {len(still_to_do)} records")
 
+    # Platform-homogeneous batches repeat the same [platform=X] tokens, giving
+    # llama.cpp's KV cache more reusable prefix material within and across
+    # batches. Stable sort, so per-platform recency order is preserved.
+    still_to_do.sort(key=lambda r: r.get("platform", ""))
+
     total_batches = (len(still_to_do) + BATCH_SIZE - 1) // BATCH_SIZE
 
+    # Concurrent path: one record per request against Ollama when aiohttp is
+    # available — the server's continuous batching parallelizes better than
+    # giant 5-way prompts (sequential Gemini path below stays as the fallback).
+    if use_ollama and aiohttp is not None and still_to_do:
+        batches = [[r] for r in still_to_do]
+        print(f"[LLM] Running {len(batches)} single-record requests with up to {OLLAMA_NUM_PARALLEL} in flight")
+        asyncio.run(_enrich_batches_async(batches, enriched_by_id, api_key, cache_conn))
+
+        result = []
+        for r in records:
+            rid = r.get("id", "")
+            result.append(enriched_by_id.get(rid, r))
+        clear_checkpoint()
+        return result
+
     for batch_num in range(total_batches):
         batch = still_to_do[batch_num * BATCH_SIZE : (batch_num + 1) * BATCH_SIZE]
         print(f"  Batch {batch_num + 1}/{total_batches} ({len(batch)} records)...", end=" ", flush=True)
 
         prompt = build_batch_prompt(batch)
         try:
-            response = call_llm(prompt, api_key, use_ollama)
+            response = call_llm(prompt, api_key, use_ollama, expect_json=True)
             results  = parse_batch_response(response, len(batch))
 
             for i, record in enumerate(batch):
                 llm_data = results[i] if i < len(results) else {}
                 enriched = safe_enrich(dict(record), llm_data)
                 enriched_by_id[record.get("id", "")] = enriched
+                _llm_cache_put(cache_conn, _record_cache_key(record), llm_data)
 
             print("✓")
         except Exception as e:
@@ -504,36 +960,53 @@ def analyze():
         print(f"[LLM] {INPUT_FILE} not found — run aggregate.py first")
         return
 
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    records = data.get("records", [])
-    meta    = data.get("meta", {})
+    if ijson is not None:
+        # Stream records one at a time instead of materializing the whole
+        # document tree — peak RAM stays flat as mentions.json grows.
+        with open(INPUT_FILE, "rb") as f:
+            records = list(ijson.items(f, "records.item", use_float=True))
+        with open(INPUT_FILE, "rb") as f:
+            meta = next(ijson.items(f, "meta", use_float=True), {})
+    else:
+        with open(INPUT_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records = data.get("records", [])
+        meta    = data.get("meta", {})
     print(f"[LLM] Loaded {len(records)} records from mentions.json")
 
     # ── Load previously enriched records as a cache (by ID) ──────────────────
     enriched_cache: Dict[str, Dict] = {}
     if os.path.exists(OUTPUT_FILE):
         try:
-            with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-                prev = json.load(f)
-            for r in prev.get("records", []):
-                if r.get("id") and r.get("topic") and r.get("key_phrases"):
-                    enriched_cache[r["id"]] = r
+            if ijson is not None:
+                # Stream straight into the cache dict — the previous document
+                # is never held in memory as a whole.
+                with open(OUTPUT_FILE, "rb") as f:
+                    for r in ijson.items(f, "records.item", use_float=True):
+                        if r.get("id") and r.get("topic") and r.get("key_phrases"):
+                            enriched_cache[r["id"]] = r
+            else:
+                with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
+                    prev = json.load(f)
+                for r in prev.get("records", []):
+                    if r.get("id") and r.get("topic") and r.get("key_phrases"):
+                        enriched_cache[r["id"]] = r
             print(f"[LLM] Cache: {len(enriched_cache)} previously enriched records")
         except Exception as e:
             print(f"[LLM] Could not load cache: {e}")
 
     # ── Merge: use cached version where available, flag new ones ─────────────
-    merged   = []
+    # Keyed by id so enriched versions can be dropped in place without
+    # rebuilding the full list after every stage; materialized once at the end.
+    merged_by_id: Dict[str, Dict] = {}
     new_recs = []
 
     for r in records:
         rid = r.get("id", "")
         if rid in enriched_cache:
-            merged.append(enriched_cache[rid])
+            merged_by_id[rid] = enriched_cache[rid]
         else:
-            merged.append(r)
+            merged_by_id[rid] = r
             new_recs.append(r)
 
     print(f"[LLM] New records needing enrichment: {len(new_recs)}")
@@ -543,26 +1016,24 @@ def analyze():
     print("[Search] Running BM25 + TF-IDF + fuzzy on new records...")
     if new_recs:
         new_recs = enrich_with_search_scores(new_recs)
-        new_by_id = {r["id"]: r for r in new_recs}
-        merged = [new_by_id.get(r.get("id"), r) for r in merged]
+        for r in new_recs:
+            merged_by_id[r["id"]] = r
 
-    word_cloud = get_word_cloud_data(merged)
-    with open(WORD_CLOUD_FILE, "w", encoding="utf-8") as f:
-        json.dump(word_cloud, f, ensure_ascii=False, indent=2)
-    print(f"[Search] Word cloud saved ({len(word_cloud)} terms)")
+    word_cloud = get_word_cloud_data(list(merged_by_id.values()))   # written below
 
     # ── Step 2: LLM enrichment (only new records) ────────────────────────────
     if (use_ollama or api_key) and new_recs:
-        enriched_new = enrich_records(new_recs, api_key, use_ollama)
-        enriched_by_id = {r.get("id"): r for r in enriched_new}
-        merged = [enriched_by_id.get(r.get("id"), r) for r in merged]
+        for r in enrich_records(new_recs, api_key, use_ollama):
+            rid = r.get("id", "")
+            if rid in merged_by_id:
+                merged_by_id[rid] = r
     elif (use_ollama or api_key) and not new_recs:
         print("[LLM] All records already enriched — nothing to do.")
 
+    merged = list(merged_by_id.values())
+
     # ── Step 3: Critical alerts ───────────────────────────────────────────────
     alerts = [r for r in merged if r.get("is_critical")]
-    with open(ALERTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(alerts, f, ensure_ascii=False, indent=2)
     print(f"[LLM] Critical alerts: {len(alerts)}")
 
     if force_digest or datetime.datetime.utcnow().weekday() == 6:
@@ -577,13 +1048,8 @@ def analyze():
     meta["new_this_run"]    = len(new_recs)
 
     # Topic/critical counts — always computed (not just when api_key present)
-    meta["by_topic"]       = {}
-    meta["critical_count"] = 0
-    for r in merged:
-        t = r.get("topic", "general")
-        meta["by_topic"][t] = meta["by_topic"].get(t, 0) + 1
-        if r.get("is_critical"):
-            meta["critical_count"] += 1
+    meta["by_topic"]       = dict(Counter(r.get("topic", "general") for r in merged))
+    meta["critical_count"] = sum(1 for r in merged if r.get("is_critical"))
 
     # ── Step 5: Sort and write ────────────────────────────────────────────────
     merged.sort(
@@ -592,16 +1058,47 @@ def analyze():
     )
 
     output = {"meta": meta, "records": merged}
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
-
-    # Update data.js for dashboard
-    js_file = "/data/data/data.js"
-    with open(js_file, "w", encoding="utf-8") as f:
-        f.write("// Auto-generated by llm_analyzer.py\n")
-        f.write("window.MATIKS_DATA = ")
-        json.dump(output, f, ensure_ascii=False)
-        f.write(";\n")
+
+    # The four output files are independent — overlap their serialization+I/O.
+    def _write_word_cloud():
+        with open(WORD_CLOUD_FILE, "w", encoding="utf-8") as f:
+            json.dump(word_cloud, f, ensure_ascii=False, indent=2)
+        print(f"[Search] Word cloud saved ({len(word_cloud)} terms)")
+
+    def _write_alerts():
+        with open(ALERTS_FILE, "w", encoding="utf-8") as f:
+            json.dump(alerts, f, ensure_ascii=False, indent=2)
+
+    def _write_output():
+        # Machine-read only (the dashboard uses data.js, humans use
+        # critical_alerts.json) — compact output halves size and encode time.
+        if orjson is not None:
+            with open(OUTPUT_FILE, "wb") as f:
+                f.write(orjson.dumps(output))
+        else:
+            with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+                json.dump(output, f, ensure_ascii=False, separators=(",", ":"))
+
+    def _write_data_js():
+        # Machine-read only — no indentation
+        if orjson is not None:
+            with open("/data/data/data.js", "wb") as f:
+                f.write(b"// Auto-generated by llm_analyzer.py\n")
+                f.write(b"window.MATIKS_DATA = ")
+                f.write(orjson.dumps(output))
+                f.write(b";\n")
+        else:
+            with open("/data/data/data.js", "w", encoding="utf-8") as f:
+                f.write("// Auto-generated by llm_analyzer.py\n")
+                f.write("window.MATIKS_DATA = ")
+                json.dump(output, f, ensure_ascii=False)
+                f.write(";\n")
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for fut in [executor.submit(w) for w in
+                    (_write_word_cloud, _write_alerts, _write_output, _write_data_js)]:
+            fut.result()
 
     print(f"\n[LLM Analyzer] Done.")
     print(f"  Total: {len(merged)} | New this run: {len(new_recs)} | Backend: {backend_used}")
@@ -5,7 +5,9 @@ Output: data/playstore_raw.json
 """
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain
 
 from google_play_scraper import reviews, Sort, app
 
@@ -21,86 +23,67 @@ def load_existing(path):
     return []
 
 
-def scrape():
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    existing = load_existing(OUTPUT_FILE)
-    existing_ids = {r["id"] for r in existing}
-
-    new_records = []
-
-    # Fetch newest reviews
+def _fetch(sort, count, label):
     try:
         result, _ = reviews(
             APP_ID,
             lang="en",
             country="us",
-            sort=Sort.NEWEST,
-            count=FETCH_COUNT,
+            sort=sort,
+            count=count,
         )
+        return result
     except Exception as e:
-        print(f"[PlayStore] Error fetching reviews: {e}")
-        result = []
+        print(f"[PlayStore] Error fetching {label} reviews: {e}")
+        return []
+
+
+def _to_record(r, scraped_at):
+    at = r.get("at")
+    created_at = at.strftime("%Y-%m-%dT%H:%M:%S") if at else ""
+    return {
+        "id": str(r.get("reviewId", "")),
+        "platform": "playstore",
+        "text": r.get("content", ""),
+        "author": r.get("userName", ""),
+        "rating": r.get("score", 0),
+        "thumbs_up": r.get("thumbsUpCount", 0),
+        "app_version": r.get("reviewCreatedVersion", ""),
+        "reply_text": r.get("replyContent", ""),
+        "url": f"https://play.google.com/store/apps/details?id={APP_ID}",
+        "created_at": created_at,
+        "scraped_at": scraped_at,
+    }
+
+
+def scrape():
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    existing = load_existing(OUTPUT_FILE)
+    existing_ids = {r["id"] for r in existing}
 
-    for r in result:
+    new_records = []
+    # One strftime per run, not one per review
+    scraped_at = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+
+    # The two sorts hit independent Play Store endpoints and are network-bound
+    # — fetch them in parallel.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        newest_future = executor.submit(_fetch, Sort.NEWEST, FETCH_COUNT, "newest")
+        relevant_future = executor.submit(_fetch, Sort.MOST_RELEVANT, 100, "most-relevant")
+        newest = newest_future.result()
+        relevant = relevant_future.result()
+
+    for r in chain(newest, relevant):
         review_id = str(r.get("reviewId", ""))
         if review_id in existing_ids:
             continue
-
-        at = r.get("at")
-        created_at = at.strftime("%Y-%m-%dT%H:%M:%S") if at else ""
-
-        record = {
-            "id": review_id,
-            "platform": "playstore",
-            "text": r.get("content", ""),
-            "author": r.get("userName", ""),
-            "rating": r.get("score", 0),
-            "thumbs_up": r.get("thumbsUpCount", 0),
-            "app_version": r.get("reviewCreatedVersion", ""),
-            "reply_text": r.get("replyContent", ""),
-            "url": f"https://play.google.com/store/apps/details?id={APP_ID}",
-            "created_at": created_at,
-            "scraped_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S"),
-        }
-        new_records.append(record)
         existing_ids.add(review_id)
-
-    # Also fetch most relevant reviews
-    try:
-        result2, _ = reviews(
-            APP_ID,
-            lang="en",
-            country="us",
-            sort=Sort.MOST_RELEVANT,
-            count=100,
-        )
-        for r in result2:
-            review_id = str(r.get("reviewId", ""))
-            if review_id in existing_ids:
-                continue
-            at = r.get("at")
-            created_at = at.strftime("%Y-%m-%dT%H:%M:%S") if at else ""
-            record = {
-                "id": review_id,
-                "platform": "playstore",
-                "text": r.get("content", ""),
-                "author": r.get("userName", ""),
-                "rating": r.get("score", 0),
-                "thumbs_up": r.get("thumbsUpCount", 0),
-                "app_version": r.get("reviewCreatedVersion", ""),
-                "reply_text": r.get("replyContent", ""),
-                "url": f"https://play.google.com/store/apps/details?id={APP_ID}",
-                "created_at": created_at,
-                "scraped_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S"),
-            }
-            new_records.append(record)
-            existing_ids.add(review_id)
-    except Exception as e:
-        print(f"[PlayStore] Error fetching most-relevant reviews: {e}")
+        new_records.append(_to_record(r, scraped_at))
 
     all_records = existing + new_records
+    # Machine-read only — compact output halves the bytes written
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_records, f, ensure_ascii=False, indent=2)
+        json.dump(all_records, f, ensure_ascii=False, separators=(",", ":"))
 
     print(f"[PlayStore] Done. New: {len(new_records)}, Total: {len(all_records)}")
 
@@ -6,6 +6,7 @@ Output: data/reddit_raw.json
 """
 import json
 import os
+import re
 import time
 import urllib.request
 import urllib.parse
@@ -38,6 +39,10 @@ MANDATORY_KEYWORDS = {
     "level", "download"
 }
 
+# Compiled alternations — one C-level scan per text instead of N substring checks
+BLOCK_RE   = re.compile("|".join(re.escape(w) for w in BLOCKLIST))
+KEYWORD_RE = re.compile("|".join(re.escape(w) for w in MANDATORY_KEYWORDS))
+
 def is_relevant(record: dict) -> bool:
     """Apply strict heuristic filtering to eliminate noise before LLM stage."""
     title = (record.get("title", "") or "").lower()
@@ -49,11 +54,11 @@ def is_relevant(record: dict) -> bool:
         return False
 
     # Rule 2: Hard blocklist check
-    if any(word in full_text for word in BLOCKLIST):
+    if BLOCK_RE.search(full_text) is not None:
         return False
 
     # Rule 3: Mandatory keyword check
-    if not any(word in full_text for word in MANDATORY_KEYWORDS):
+    if KEYWORD_RE.search(full_text) is None:
         return False
 
     return True
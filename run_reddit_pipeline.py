@@ -13,23 +13,122 @@ Run from the SCRAPPER directory:
 Works with LOCAL Windows paths (no Docker needed).
 """
 
+import asyncio
+import hashlib
+import io
 import json
+import math
+import operator
 import os
+import re
+import shelve
 import sys
 import time
 import datetime
 import urllib.request
 import urllib.parse
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp   # optional — concurrent Reddit queries in stage 1
+except ImportError:
+    aiohttp = None
+
+try:
+    from aiolimiter import AsyncLimiter
+except ImportError:
+    AsyncLimiter = None
+
+try:
+    import ahocorasick   # optional — single-pass keyword scan in is_relevant
+except ImportError:
+    ahocorasick = None
+
+try:
+    from pybloom_live import ScalableBloomFilter   # optional — seen-id memory
+except ImportError:
+    ScalableBloomFilter = None
+
+try:
+    import orjson   # optional — C-backed JSON for the large read/write paths
+except ImportError:
+    orjson = None
+
+try:
+    import ijson    # optional — stream-parse Reddit listings field by field
+except ImportError:
+    ijson = None
+
+try:
+    import requests as _requests   # optional — keep-alive for the sync paths
+except ImportError:
+    _requests = None
+
+
+def _loads(data):
+    """Parse JSON from bytes or str with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def _dumps_bytes(obj):
+    """Serialize to UTF-8 bytes (compact) for HTTP bodies and data.js."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _load_json(path):
+    with open(path, "rb") as f:
+        return _loads(f.read())
+
+
+def _write_json(path, obj):
+    """Pretty-printed JSON dump; orjson's C formatter when available."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+
+
+class _TokenBucket:
+    """Minimal stand-in for aiolimiter.AsyncLimiter: spaces requests
+    time_period/max_rate apart, shared across all query coroutines."""
+
+    def __init__(self, max_rate: float, time_period: float):
+        self._interval = time_period / max_rate
+        self._lock = asyncio.Lock()
+        self._next_at = 0.0
+
+    async def __aenter__(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+                now = loop.time()
+            self._next_at = now + self._interval
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
 
 # ── Local Paths (override Docker /data/data paths) ───────────────────────────
 BASE_DIR        = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR        = os.path.join(BASE_DIR, "data")
-REDDIT_RAW      = os.path.join(DATA_DIR, "reddit_raw.json")
+REDDIT_RAW      = os.path.join(DATA_DIR, "reddit_raw.json")    # legacy layout
+REDDIT_RAW_JSONL = os.path.join(DATA_DIR, "reddit_raw.jsonl")
 MENTIONS_FILE   = os.path.join(DATA_DIR, "mentions.json")
 ENRICHED_FILE   = os.path.join(DATA_DIR, "mentions_enriched.json")
 CONFIG_FILE     = os.path.join(BASE_DIR, "config.env")
 DATA_JS         = os.path.join(DATA_DIR, "data.js")
+SEEN_BLOOM_FILE = os.path.join(DATA_DIR, "seen_bloom.bin")
 WORD_CLOUD_FILE = os.path.join(DATA_DIR, "word_cloud.json")
 ALERTS_FILE     = os.path.join(DATA_DIR, "critical_alerts.json")
 
@@ -55,6 +154,18 @@ def load_config():
 HEADERS  = {"User-Agent": "Matiks-Monitor-IITG/2.0 (brand monitoring bot)"}
 MAX_PAGES = 8   # up from 5 — more pages = more posts
 
+# One pooled session for all sync HTTP. urllib.request opens a fresh TCP+TLS
+# connection per call (~100-300 ms handshake against Gemini); a Session keeps
+# connections alive so the handshake is paid once per host, not per request.
+if _requests is not None:
+    _HTTP = _requests.Session()
+    _HTTP.headers.update(HEADERS)
+    _http_adapter = _requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    _HTTP.mount("https://", _http_adapter)
+    _HTTP.mount("http://", _http_adapter)
+else:
+    _HTTP = None
+
 # Targeted queries specifically for the Matiks math-puzzle startup
 QUERIES = [
     '"Matiks" math app',
@@ -85,41 +196,250 @@ APP_KEYWORDS = {
     "arithmetic", "calculation", "learning", "education",
 }
 
+# For the no-pyahocorasick fallback: single-word keywords double as an
+# exact-token fast accept — a token hit is always a substring hit, so the
+# common case (post mentions "app", "game", ...) costs O(tokens) hash
+# lookups. Misses and the blocklist fall through to plain substring scans,
+# keeping the automaton path's substring semantics ("apps" still matches
+# "app", "motorola" still trips "motor").
+_WORD_RE = re.compile(r"[a-z]+")
+_KW_TOKEN_FAST = frozenset(w for w in APP_KEYWORDS if " " not in w and "-" not in w)
+
+# Aho–Corasick automata: one linear scan over the text instead of ~50
+# sequential substring searches. Built once at import.
+def _build_automaton(phrases):
+    ac = ahocorasick.Automaton()
+    for p in phrases:
+        ac.add_word(p, p)
+    ac.make_automaton()
+    return ac
+
+
+if ahocorasick is not None:
+    _BLOCK_AC = _build_automaton(BLOCKLIST)
+    _KW_AC    = _build_automaton(APP_KEYWORDS)
+else:
+    _BLOCK_AC = _KW_AC = None
+
+
+def _strip_private(record: dict) -> dict:
+    """Drop underscore-prefixed working keys (e.g. _lc_text) before writing."""
+    return {k: v for k, v in record.items() if not k.startswith("_")}
+
+
+def _append_jsonl(path, records):
+    """Append records one-per-line. Write cost is O(new records), not
+    O(all records ever scraped) like re-serializing a whole JSON array."""
+    with open(path, "ab") as f:
+        for r in records:
+            f.write(_dumps_bytes(_strip_private(r)) + b"\n")
+
+
 def is_relevant(record: dict) -> bool:
     """Strict relevance filter: keep only Matiks startup posts."""
-    title     = (record.get("title", "") or "").lower()
-    text      = (record.get("text",  "") or "").lower()
-    full_text = title + " " + text
+    full_text = record.get("_lc_text")
+    if full_text is None:
+        title     = (record.get("title", "") or "").lower()
+        text      = (record.get("text",  "") or "").lower()
+        full_text = title + " " + text
 
     # Must mention matiks at all
     if "matiks" not in full_text:
         return False
 
-    # Blocklist: definitely not the startup
-    if any(word in full_text for word in BLOCKLIST):
+    if _BLOCK_AC is not None:
+        # Blocklist: definitely not the startup
+        for _ in _BLOCK_AC.iter(full_text):
+            return False
+        # Must have at least one app-context keyword
+        for _ in _KW_AC.iter(full_text):
+            return True
         return False
 
-    # Must have at least one app-context keyword
-    if not any(word in full_text for word in APP_KEYWORDS):
+    # Fallback without pyahocorasick — same substring semantics, with an
+    # exact-token fast accept for the common single-word keyword hit
+    if any(w in full_text for w in BLOCKLIST):
         return False
+    if not _KW_TOKEN_FAST.isdisjoint(frozenset(_WORD_RE.findall(full_text))):
+        return True
+    return any(w in full_text for w in APP_KEYWORDS)
 
-    return True
 
+# Only q and after vary between pages — the rest of the query string is
+# constant, so encode it once instead of urlencode-walking a dict per fetch
+_STATIC_PARAMS = "&sort=new&limit=100&type=link%2Ccomment&t=all"
 
-def fetch_reddit(query: str, after=None):
-    params = {
-        "q": query,
-        "sort": "new",
-        "limit": "100",
-        "type": "link,comment",
-        "t": "all",
-    }
+
+def _search_url(query: str, after=None) -> str:
+    url = (f"https://www.reddit.com/search.json"
+           f"?q={urllib.parse.quote_plus(query)}{_STATIC_PARAMS}")
     if after:
-        params["after"] = after
-    url = f"https://www.reddit.com/search.json?{urllib.parse.urlencode(params)}"
+        url += f"&after={after}"
+    return url
+
+
+def fetch_reddit(query: str, after=None):
+    url = _search_url(query, after)
+    if _HTTP is not None:
+        resp = _HTTP.get(url, timeout=15)
+        resp.raise_for_status()
+        return resp.content
     req = urllib.request.Request(url, headers=HEADERS)
     with urllib.request.urlopen(req, timeout=15) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+        return resp.read()
+
+
+async def fetch_reddit_async(session, query: str, after=None):
+    url = _search_url(query, after)
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+        resp.raise_for_status()
+        return await resp.read()
+
+
+def _parse_listing(raw):
+    """Pull per-child data dicts + the pagination cursor out of a raw
+    search.json response. With ijson only data.children[*].data is ever
+    built; the rest of the ~400 KB listing (wrappers, metadata) is streamed
+    past instead of materialized. Fallback parses the whole dict."""
+    if ijson is not None:
+        after = next(ijson.items(io.BytesIO(raw), "data.after"), None)
+        datas = ijson.items(io.BytesIO(raw), "data.children.item.data",
+                            use_float=True)
+        return datas, after
+    listing = _loads(raw).get("data", {})
+    return ((c.get("data", {}) for c in listing.get("children", [])),
+            listing.get("after"))
+
+
+class _SeenIds:
+    """Seen-id membership backed by an exact set for this run's records plus
+    a persistent Bloom filter remembering every id ever *fetched* — including
+    irrelevant ones that never make it into reddit_raw.json, which would
+    otherwise be re-filtered on every run. ~9 bits per id instead of a Python
+    string kept alive forever; 0.1% false-positive rate means at worst a
+    genuinely new post is skipped once in a thousand."""
+
+    def __init__(self, ids, bloom=None):
+        self.exact = set(ids)
+        self.bloom = bloom
+
+    def __contains__(self, post_id):
+        return post_id in self.exact or (
+            self.bloom is not None and post_id in self.bloom
+        )
+
+    def add(self, post_id):
+        self.exact.add(post_id)
+        if self.bloom is not None:
+            self.bloom.add(post_id)
+
+
+def _load_seen_bloom():
+    if ScalableBloomFilter is None:
+        return None
+    if os.path.exists(SEEN_BLOOM_FILE):
+        try:
+            with open(SEEN_BLOOM_FILE, "rb") as f:
+                return ScalableBloomFilter.fromfile(f)
+        except Exception as e:
+            print(f"  [Reddit] Could not load seen-id bloom ({e}) — starting fresh")
+    return ScalableBloomFilter(initial_capacity=10_000, error_rate=0.001)
+
+
+def _save_seen_bloom(bloom):
+    if bloom is None:
+        return
+    try:
+        with open(SEEN_BLOOM_FILE, "wb") as f:
+            bloom.tofile(f)
+    except Exception as e:
+        print(f"  [Reddit] Could not persist seen-id bloom: {e}")
+
+
+def _ingest_children(datas, seen_ids, new_records):
+    """Convert per-child data dicts to records, applying the relevance gate.
+    Shared by the sync and async scrape paths. Returns (# new relevant posts,
+    # children seen) — the latter lets callers stop on an empty page."""
+    q_new = 0
+    n_children = 0
+    # One clock read + isoformat per page, not one per child
+    now_iso = datetime.datetime.now().isoformat()
+    for d in datas:
+        n_children += 1
+        post_id = d.get("id")
+        if not post_id or post_id in seen_ids:
+            continue
+
+        title = d.get("title", "")
+        text  = d.get("selftext", "") or d.get("body", "") or ""
+        # Lowercase once here — every later filter pass reads this cache
+        # (VADER still gets the raw text: it uses capitalization for intensity)
+        lc_text = (title + " " + text).lower()
+
+        # Gate first: most children fail it, and only the keepers pay the
+        # fromtimestamp + isoformat construction below
+        if is_relevant({"_lc_text": lc_text}):
+            new_records.append({
+                "id":          post_id,
+                "platform":    "reddit",
+                "subreddit":   d.get("subreddit", ""),
+                "title":       title,
+                "text":        text,
+                "author":      d.get("author", ""),
+                "score":       d.get("score", 0),
+                "url":         f"https://reddit.com{d.get('permalink', '')}",
+                "created_utc": datetime.datetime.fromtimestamp(
+                                   d.get("created_utc", 0)
+                               ).isoformat(),
+                "scraped_at":  now_iso,
+                "_lc_text":    lc_text,
+            })
+            q_new += 1
+        seen_ids.add(post_id)  # mark seen either way so we don't retry
+
+    return q_new, n_children
+
+
+async def _crawl_query_async(session, limiter, query, seen_ids, new_records):
+    """Walk one query's pages sequentially (the `after` cursor forces that);
+    all queries run concurrently, sharing one global rate limiter so total
+    QPS toward Reddit stays constant regardless of parallelism."""
+    after = None
+    q_new = 0
+    for page in range(MAX_PAGES):
+        try:
+            async with limiter:
+                raw = await fetch_reddit_async(session, query, after)
+            # Parsing and ingesting stay inside the try: a 429/HTML body
+            # surfaces as a parse error (lazily, with ijson) and must skip
+            # this query rather than abort the whole scrape
+            datas, after = _parse_listing(raw)
+            q_added, n_children = _ingest_children(datas, seen_ids, new_records)
+        except Exception as e:
+            print(f"  [Reddit] Error on query '{query}': {e}")
+            break
+
+        q_new += q_added
+        if not n_children or not after:
+            break
+
+    print(f"  Query '{query}': +{q_new} new relevant posts")
+    return q_new
+
+
+async def _scrape_all_async(seen_ids, new_records):
+    # ~1 request / 1.5s globally — same budget the old per-page sleep paid,
+    # but shared, so no coroutine idles while another could be fetching.
+    if AsyncLimiter is not None:
+        limiter = AsyncLimiter(max_rate=1, time_period=1.5)
+    else:
+        limiter = _TokenBucket(max_rate=1, time_period=1.5)
+    async with aiohttp.ClientSession(headers=HEADERS) as session:
+        counts = await asyncio.gather(*[
+            _crawl_query_async(session, limiter, q, seen_ids, new_records)
+            for q in QUERIES
+        ])
+    return sum(counts)
 
 
 def stage1_scrape():
@@ -129,69 +449,56 @@ def stage1_scrape():
 
     # Load existing records to avoid re-adding
     existing = []
-    if os.path.exists(REDDIT_RAW):
+    if os.path.exists(REDDIT_RAW_JSONL):
         try:
-            with open(REDDIT_RAW, encoding="utf-8") as f:
-                existing = json.load(f)
+            with open(REDDIT_RAW_JSONL, "rb") as f:
+                existing = [_loads(line) for line in f if line.strip()]
         except Exception:
             existing = []
+    elif os.path.exists(REDDIT_RAW):
+        # One-time migration from the legacy whole-array reddit_raw.json
+        try:
+            existing = _load_json(REDDIT_RAW)
+        except Exception:
+            existing = []
+        if existing:
+            _append_jsonl(REDDIT_RAW_JSONL, existing)
 
-    seen_ids = {r["id"] for r in existing}
+    bloom = _load_seen_bloom()
+    seen_ids = _SeenIds((r["id"] for r in existing), bloom)
     new_records = list(existing)
     new_count = 0
 
-    for query in QUERIES:
-        after = None
-        q_new = 0
-        for page in range(MAX_PAGES):
-            try:
-                data = fetch_reddit(query, after)
-            except Exception as e:
-                print(f"  [Reddit] Error on query '{query}': {e}")
-                break
-
-            children = data.get("data", {}).get("children", [])
-            if not children:
-                break
-
-            for child in children:
-                d = child["data"]
-                post_id = d.get("id")
-                if not post_id or post_id in seen_ids:
-                    continue
-
-                record = {
-                    "id":          post_id,
-                    "platform":    "reddit",
-                    "subreddit":   d.get("subreddit", ""),
-                    "title":       d.get("title", ""),
-                    "text":        d.get("selftext", "") or d.get("body", "") or "",
-                    "author":      d.get("author", ""),
-                    "score":       d.get("score", 0),
-                    "url":         f"https://reddit.com{d.get('permalink', '')}",
-                    "created_utc": datetime.datetime.fromtimestamp(
-                                       d.get("created_utc", 0)
-                                   ).isoformat(),
-                    "scraped_at":  datetime.datetime.now().isoformat(),
-                }
-
-                if is_relevant(record):
-                    new_records.append(record)
-                    seen_ids.add(post_id)
-                    q_new += 1
-                    new_count += 1
-                else:
-                    seen_ids.add(post_id)  # still mark seen so we don't retry
-
-            after = data.get("data", {}).get("after")
-            if not after:
-                break
-            time.sleep(1.5)  # rate limit
-
-        print(f"  Query '{query}': +{q_new} new relevant posts")
-
-    with open(REDDIT_RAW, "w", encoding="utf-8") as f:
-        json.dump(new_records, f, ensure_ascii=False, indent=2)
+    if aiohttp is not None:
+        # Concurrent path: every query crawls its own page chain in parallel
+        new_count = asyncio.run(_scrape_all_async(seen_ids, new_records))
+    else:
+        for query in QUERIES:
+            after = None
+            q_new = 0
+            for page in range(MAX_PAGES):
+                try:
+                    raw = fetch_reddit(query, after)
+                    # Parse errors (non-JSON rate-limit bodies) skip the
+                    # query like fetch errors do
+                    datas, after = _parse_listing(raw)
+                    q_added, n_children = _ingest_children(datas, seen_ids, new_records)
+                except Exception as e:
+                    print(f"  [Reddit] Error on query '{query}': {e}")
+                    break
+
+                q_new += q_added
+                if not n_children or not after:
+                    break
+                time.sleep(1.5)  # rate limit
+
+            new_count += q_new
+            print(f"  Query '{query}': +{q_new} new relevant posts")
+
+    # Append only this run's records — historical lines are already on disk
+    _append_jsonl(REDDIT_RAW_JSONL, new_records[len(existing):])
+
+    _save_seen_bloom(bloom)
 
     print(f"\n  Total Reddit records: {len(new_records)} (+{new_count} new)")
     return new_records
@@ -201,34 +508,51 @@ def stage1_scrape():
 # STAGE 2 — Aggregate (merge Reddit into mentions.json)
 # ═══════════════════════════════════════════════════════════════════════════════
 
+try:
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    _VADER = SentimentIntensityAnalyzer()
+except ImportError:
+    _VADER = None
+
+# Below this many records the process pool's spawn cost outweighs the win
+_VADER_POOL_MIN = 200
+
+# Persistent text-hash → sentiment shelf; re-scraped posts skip VADER entirely
+VADER_CACHE = os.path.join(DATA_DIR, "vader_cache")
+
+
+def _vader_key(text):
+    # blake2b, not builtin hash(): hash() is salted per process, so keys
+    # would never match across runs
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _vader_score(text):
+    """Score one text. Module-scope so ProcessPoolExecutor workers can pickle
+    it (each worker re-imports the module and gets its own analyzer)."""
+    if not _VADER or not text:
+        return {"label": "neutral", "compound": 0.0}
+    s = _VADER.polarity_scores(text)
+    c = s["compound"]
+    label = "positive" if c >= 0.05 else ("negative" if c <= -0.05 else "neutral")
+    return {"label": label, "compound": round(c, 4),
+            "pos": round(s["pos"], 4), "neu": round(s["neu"], 4),
+            "neg": round(s["neg"], 4)}
+
+
 def stage2_aggregate(reddit_records):
     print("\n" + "="*60)
     print("STAGE 2 — Aggregate & VADER Sentiment")
     print("="*60)
 
-    try:
-        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-        analyzer = SentimentIntensityAnalyzer()
-    except ImportError:
+    if _VADER is None:
         print("  [Warning] vaderSentiment not installed — skipping VADER scores")
-        analyzer = None
-
-    def get_sentiment(text):
-        if not analyzer or not text:
-            return {"label": "neutral", "compound": 0.0}
-        s = analyzer.polarity_scores(text)
-        c = s["compound"]
-        label = "positive" if c >= 0.05 else ("negative" if c <= -0.05 else "neutral")
-        return {"label": label, "compound": round(c, 4),
-                "pos": round(s["pos"], 4), "neu": round(s["neu"], 4),
-                "neg": round(s["neg"], 4)}
 
     # Load existing non-reddit records from current mentions.json
     existing_records = []
     if os.path.exists(MENTIONS_FILE):
         try:
-            with open(MENTIONS_FILE, encoding="utf-8") as f:
-                prev = json.load(f)
+            prev = _load_json(MENTIONS_FILE)
             existing_records = [
                 r for r in prev.get("records", [])
                 if r.get("platform") != "reddit"
@@ -236,19 +560,53 @@ def stage2_aggregate(reddit_records):
         except Exception as e:
             print(f"  [Warning] Could not read mentions.json: {e}")
 
-    # Enrich Reddit records with VADER
+    # Enrich Reddit records with VADER. Scores are memoized by text hash in a
+    # shelf so re-scraped/unchanged posts cost one lookup across runs; only
+    # misses get scored. polarity_scores is pure-Python CPU work, so large
+    # miss sets fan out across cores while small runs stay in-process.
+    texts = [(r.get("title", "") + " " + r.get("text", "")).strip() for r in reddit_records]
+    try:
+        cache = shelve.open(VADER_CACHE)
+    except Exception as e:
+        print(f"  [Warning] Could not open VADER cache: {e}")
+        cache = None
+
+    keys = [_vader_key(t) for t in texts]
+    scores = [cache.get(k) if cache is not None else None for k in keys]
+    miss_idx = [i for i, s in enumerate(scores) if s is None]
+    miss_texts = [texts[i] for i in miss_idx]
+
+    if _VADER is not None and len(miss_texts) >= _VADER_POOL_MIN:
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor() as executor:
+                miss_scores = list(executor.map(_vader_score, miss_texts, chunksize=64))
+        except Exception as e:
+            print(f"  [Warning] Sentiment pool failed ({e}) — scoring serially")
+            miss_scores = [_vader_score(t) for t in miss_texts]
+    else:
+        miss_scores = [_vader_score(t) for t in miss_texts]
+
+    for i, s in zip(miss_idx, miss_scores):
+        scores[i] = s
+        if cache is not None:
+            cache[keys[i]] = s
+    if cache is not None:
+        cache.close()
+
     enriched_reddit = []
-    for r in reddit_records:
-        text = (r.get("title", "") + " " + r.get("text", "")).strip()
-        r["sentiment"] = get_sentiment(text)
+    for r, sentiment in zip(reddit_records, scores):
+        r["sentiment"] = sentiment
         enriched_reddit.append(r)
 
     all_records = existing_records + enriched_reddit
-    # Sort newest first
-    all_records.sort(
-        key=lambda r: (r.get("created_utc") or r.get("created_at") or r.get("scraped_at") or ""),
-        reverse=True,
-    )
+    # Sort newest first. The key is computed once per record in a single pass;
+    # itemgetter is a C-level callable, so the N log N comparisons never
+    # re-enter Python. _sortkey is dropped by _strip_private on write.
+    for r in all_records:
+        r["_sortkey"] = (r.get("created_utc") or r.get("created_at")
+                         or r.get("scraped_at") or "")
+    all_records.sort(key=operator.itemgetter("_sortkey"), reverse=True)
 
     # Stats
     platform_counts = {}
@@ -267,9 +625,8 @@ def stage2_aggregate(reddit_records):
         "by_sentiment": sentiment_counts,
     }
 
-    output = {"meta": meta, "records": all_records}
-    with open(MENTIONS_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    output = {"meta": meta, "records": [_strip_private(r) for r in all_records]}
+    _write_json(MENTIONS_FILE, output)
 
     print(f"  Total records: {len(all_records)}")
     print(f"  By platform:  {platform_counts}")
@@ -289,44 +646,87 @@ RATE_LIMIT_S  = 1.0
 MAX_TEXT_LEN  = 400
 RELEVANCE_MIN = 7
 
-VALID_TOPICS = {
+VALID_TOPICS = frozenset({
     "bug_report", "feature_request", "praise",
     "question", "competitor_comparison", "general", "irrelevant",
-}
-VALID_SENTIMENTS = {
+})
+VALID_SENTIMENTS = frozenset({
     "very_negative", "negative", "mixed", "positive", "very_positive",
-}
+})
 
-import re
+
+# Prompt-hash → parsed-results shelf: identical batch prompts (retries,
+# reposts carrying the same text under new ids) skip the network entirely,
+# both within a run and across runs
+LLM_CACHE = os.path.join(DATA_DIR, "llm_cache")
+
+
+def _prompt_key(prompt, use_ollama):
+    backend = "ollama" if use_ollama else "gemini"
+    digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+    return f"{backend}:{digest}"
 
 
 def check_ollama():
     try:
-        req = urllib.request.Request(f"{OLLAMA_URL}/api/tags", method="GET")
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            if resp.status != 200:
+        if _HTTP is not None:
+            resp = _HTTP.get(f"{OLLAMA_URL}/api/tags", timeout=2)
+            if resp.status_code != 200:
                 return False
-            data = json.loads(resp.read().decode())
-            models = [m.get("name", "") for m in data.get("models", [])]
-            base = OLLAMA_MODEL.split(":")[0]
-            return any(m == OLLAMA_MODEL or m.startswith(base + ":") for m in models)
+            data = _loads(resp.content)
+        else:
+            req = urllib.request.Request(f"{OLLAMA_URL}/api/tags", method="GET")
+            with urllib.request.urlopen(req, timeout=2) as resp:
+                if resp.status != 200:
+                    return False
+                data = _loads(resp.read())
+        models = [m.get("name", "") for m in data.get("models", [])]
+        base = OLLAMA_MODEL.split(":")[0]
+        return any(m == OLLAMA_MODEL or m.startswith(base + ":") for m in models)
     except Exception:
         return False
 
 
+def warm_ollama():
+    """Load the model before the batch loop so no batch pays the cold start;
+    keep_alive in the generate calls then keeps it resident."""
+    try:
+        body = _dumps_bytes({"model": OLLAMA_MODEL, "prompt": "",
+                             "keep_alive": "10m"})
+        if _HTTP is not None:
+            _HTTP.post(f"{OLLAMA_URL}/api/generate", data=body,
+                       headers={"Content-Type": "application/json"}, timeout=120)
+        else:
+            req = urllib.request.Request(
+                f"{OLLAMA_URL}/api/generate", data=body,
+                headers={"Content-Type": "application/json"}, method="POST",
+            )
+            urllib.request.urlopen(req, timeout=120).close()
+    except Exception:
+        pass   # best-effort; first real batch will load the model instead
+
+
 def call_ollama(prompt):
-    body = json.dumps({
-        "model": OLLAMA_MODEL, "prompt": prompt,
+    body = _dumps_bytes({
+        "model": OLLAMA_MODEL, "prompt": prompt, "system": SYSTEM_INSTRUCTION,
+        "keep_alive": "10m",
         "stream": False, "options": {"temperature": 0.1, "num_predict": 1024},
-    }).encode()
+    })
     for attempt in range(3):
         try:
+            if _HTTP is not None:
+                resp = _HTTP.post(
+                    f"{OLLAMA_URL}/api/generate", data=body,
+                    headers={"Content-Type": "application/json"}, timeout=180,
+                )
+                resp.raise_for_status()
+                return _loads(resp.content)["response"]
             req = urllib.request.Request(
                 f"{OLLAMA_URL}/api/generate", data=body,
                 headers={"Content-Type": "application/json"}, method="POST",
             )
             with urllib.request.urlopen(req, timeout=180) as resp:
-                return json.loads(resp.read().decode())["response"]
+                return _loads(resp.read())["response"]
         except Exception as e:
             time.sleep(5 * (attempt + 1))
     raise RuntimeError("Ollama: all retries failed")
@@ -335,18 +735,33 @@ def call_ollama(prompt):
 def call_gemini(api_key, prompt):
     url = (f"https://generativelanguage.googleapis.com/v1beta/models/"
            f"{GEMINI_MODEL}:generateContent?key={api_key}")
-    body = json.dumps({
+    body = _dumps_bytes({
+        "systemInstruction": {"parts": [{"text": SYSTEM_INSTRUCTION}]},
         "contents": [{"parts": [{"text": prompt}]}],
         "generationConfig": {"temperature": 0.1, "maxOutputTokens": 1024},
-    }).encode()
+    })
     for attempt in range(4):
+        if _HTTP is not None:
+            resp = _HTTP.post(
+                url, data=body,
+                headers={"Content-Type": "application/json"}, timeout=30,
+            )
+            if resp.status_code == 429 and attempt < 3:
+                wait = 60 * (attempt + 1)
+                print(f"    [rate-limit] 429 — waiting {wait}s...", flush=True)
+                time.sleep(wait)
+                continue
+            if resp.status_code != 200:
+                raise RuntimeError(f"Gemini HTTP {resp.status_code}: {resp.text[:200]}")
+            r = _loads(resp.content)
+            return r["candidates"][0]["content"]["parts"][0]["text"]
         try:
             req = urllib.request.Request(
                 url, data=body,
                 headers={"Content-Type": "application/json"}, method="POST",
             )
             with urllib.request.urlopen(req, timeout=30) as resp:
-                r = json.loads(resp.read().decode())
+                r = _loads(resp.read())
                 return r["candidates"][0]["content"]["parts"][0]["text"]
         except urllib.error.HTTPError as e:
             body_txt = e.read().decode("utf-8", errors="ignore")
@@ -359,6 +774,105 @@ def call_gemini(api_key, prompt):
     raise RuntimeError("Gemini: max retries exceeded")
 
 
+async def call_ollama_async(session, prompt):
+    body = _dumps_bytes({
+        "model": OLLAMA_MODEL, "prompt": prompt, "system": SYSTEM_INSTRUCTION,
+        "keep_alive": "10m",
+        "stream": False, "options": {"temperature": 0.1, "num_predict": 1024},
+    })
+    for attempt in range(3):
+        try:
+            async with session.post(
+                f"{OLLAMA_URL}/api/generate", data=body,
+                headers={"Content-Type": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=180),
+            ) as resp:
+                resp.raise_for_status()
+                return _loads(await resp.read())["response"]
+        except Exception:
+            await asyncio.sleep(5 * (attempt + 1))
+    raise RuntimeError("Ollama: all retries failed")
+
+
+async def call_gemini_async(session, api_key, prompt):
+    url = (f"https://generativelanguage.googleapis.com/v1beta/models/"
+           f"{GEMINI_MODEL}:generateContent?key={api_key}")
+    body = _dumps_bytes({
+        "systemInstruction": {"parts": [{"text": SYSTEM_INSTRUCTION}]},
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {"temperature": 0.1, "maxOutputTokens": 1024},
+    })
+    for attempt in range(4):
+        async with session.post(
+            url, data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as resp:
+            raw = await resp.read()
+            if resp.status == 429 and attempt < 3:
+                wait = 15 * 2 ** attempt   # exponential — peers back off too
+                print(f"    [rate-limit] 429 — waiting {wait}s...", flush=True)
+                await asyncio.sleep(wait)
+                continue
+            if resp.status != 200:
+                body_txt = raw.decode("utf-8", errors="ignore")
+                raise RuntimeError(f"Gemini HTTP {resp.status}: {body_txt[:200]}")
+            r = _loads(raw)
+            return r["candidates"][0]["content"]["parts"][0]["text"]
+    raise RuntimeError("Gemini: max retries exceeded")
+
+
+async def call_llm_async(session, prompt, api_key, use_ollama):
+    if use_ollama:
+        try:
+            return await call_ollama_async(session, prompt)
+        except Exception as e:
+            if api_key:
+                print(f"    [LLM] Ollama failed ({e}), falling back to Gemini...")
+                return await call_gemini_async(session, api_key, prompt)
+            raise
+    if api_key:
+        return await call_gemini_async(session, api_key, prompt)
+    raise RuntimeError("No LLM backend available")
+
+
+def _cacheable(results, batch_size):
+    """Only complete, non-empty classifications enter the persistent cache.
+    parse_response pads unparseable output with {} — caching that would pin
+    the default verdicts to this prompt forever (the sqlite cache in
+    llm_analyzer has the same guard)."""
+    return (len(results) == batch_size
+            and all(isinstance(r, dict) and r for r in results))
+
+
+async def classify_all(batches, api_key, use_ollama, llm_cache):
+    """Classify every batch concurrently. Gemini takes several requests in
+    flight (free tier is fine with 5); Ollama runs one model locally, so its
+    concurrency stays at 1 — same order as the serial loop, minus the sleeps."""
+    sem = asyncio.Semaphore(1 if use_ollama else 5)
+
+    async with aiohttp.ClientSession() as session:
+
+        async def one(bn, batch):
+            prompt = build_user_prompt(batch)
+            key = _prompt_key(prompt, use_ollama)
+            cached = llm_cache.get(key)
+            if cached is not None:
+                return cached
+            async with sem:
+                print(f"    Batch {bn+1}/{len(batches)} ({len(batch)} records)...", flush=True)
+                response = await call_llm_async(session, prompt, api_key, use_ollama)
+            results = parse_response(response, len(batch))
+            if _cacheable(results, len(batch)):
+                llm_cache[key] = results
+            return results
+
+        return await asyncio.gather(
+            *(one(bn, b) for bn, b in enumerate(batches)),
+            return_exceptions=True,
+        )
+
+
 def call_llm(prompt, api_key, use_ollama):
     if use_ollama:
         try:
@@ -373,13 +887,11 @@ def call_llm(prompt, api_key, use_ollama):
     raise RuntimeError("No LLM backend available")
 
 
-def build_batch_prompt(batch):
-    items = []
-    for i, r in enumerate(batch):
-        text = (r.get("title", "") + " " + r.get("text", "")).strip()[:MAX_TEXT_LEN]
-        items.append(f'{i+1}. [r/{r.get("subreddit","?")}] """{text}"""')
-
-    return f"""You are a brand relevance classifier for "Matiks" — an IIT Guwahati startup's math puzzle mobile game.
+# Static preamble, identical for every batch. Sent once per request as the
+# system prompt: Gemini's systemInstruction is a prefix the API can cache, and
+# Ollama's system field plus keep_alive lets the local model reuse its KV
+# cache across batches instead of re-prefilling ~500 tokens each time.
+SYSTEM_INSTRUCTION = """You are a brand relevance classifier for "Matiks" — an IIT Guwahati startup's math puzzle mobile game.
 
 CORE CONTEXT:
 - Matiks is a math/brain training app with puzzles, streaks, and daily challenges.
@@ -393,7 +905,7 @@ RELEVANCE SCORING (0-10):
 - 4-6: Ambiguous.
 - 0-3: Motorcycles, Tagalog slang, Filipino politics, rap battles = NOT the app.
 
-For each of the {len(batch)} numbered posts return a JSON array of {len(batch)} objects:
+For the numbered posts return a JSON array with exactly one object per post:
 - "relevance": integer 0-10
 - "topic": bug_report | feature_request | praise | question | competitor_comparison | general | irrelevant
   (If relevance < 7, topic MUST be "irrelevant")
@@ -401,18 +913,44 @@ For each of the {len(batch)} numbered posts return a JSON array of {len(batch)}
 - "key_phrases": array of up to 3 meaningful phrases from the post
 - "is_critical": true ONLY if topic=bug_report AND llm_sentiment=very_negative
 
-Return ONLY the raw JSON array.
+Return ONLY the raw JSON array."""
 
-Posts:
-{chr(10).join(items)}
-"""
+
+def build_user_prompt(batch):
+    items = []
+    for i, r in enumerate(batch):
+        text = (r.get("title", "") + " " + r.get("text", "")).strip()[:MAX_TEXT_LEN]
+        items.append(f'{i+1}. [r/{r.get("subreddit","?")}] """{text}"""')
+
+    return (f"Classify these {len(batch)} posts "
+            f"(return a JSON array of {len(batch)} objects):\n\n"
+            + "\n".join(items))
+
+
+_FENCE_RE = re.compile(r"^```[a-z]*\n?|\n?```$", re.MULTILINE)
+
+
+def _iter_objects(s):
+    """Yield balanced top-level {...} chunks in one O(n) pass — unlike the
+    old flat-brace regex this handles nested objects and never backtracks."""
+    depth = 0
+    start = -1
+    for i, c in enumerate(s):
+        if c == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == "}" and depth > 0:
+            depth -= 1
+            if depth == 0 and start >= 0:
+                yield s[start:i + 1]
+                start = -1
 
 
 def parse_response(text, batch_size):
-    text = re.sub(r"^```[a-z]*\n?", "", text.strip(), flags=re.MULTILINE)
-    text = re.sub(r"\n?```$", "", text, flags=re.MULTILINE).strip()
+    text = _FENCE_RE.sub("", text.strip()).strip()
     try:
-        parsed = json.loads(text)
+        parsed = _loads(text)
         if isinstance(parsed, list):
             return parsed
     except Exception:
@@ -420,13 +958,13 @@ def parse_response(text, batch_size):
     s, e = text.find("["), text.rfind("]") + 1
     if s >= 0 and e > s:
         try:
-            return json.loads(text[s:e])
+            return _loads(text[s:e])
         except Exception:
             pass
     recovered = []
-    for m in re.finditer(r'\{[^{}]+\}', text, re.DOTALL):
+    for chunk in _iter_objects(text):
         try:
-            recovered.append(json.loads(m.group()))
+            recovered.append(_loads(chunk))
         except Exception:
             pass
     if recovered:
@@ -436,24 +974,44 @@ def parse_response(text, batch_size):
 
 
 def safe_enrich(record, llm_data):
-    r = dict(record)
-    try:
-        r["relevance"] = max(0, min(10, int(float(llm_data.get("relevance", 5) or 5))))
-    except (TypeError, ValueError):
-        r["relevance"] = 5
-
-    topic = str(llm_data.get("topic", "general")).strip().lower()
-    r["topic"] = topic if topic in VALID_TOPICS else "general"
+    """Validate one record's LLM fields. Runs once per classified record, so
+    the common case — well-formed output — takes the cheap path: dict.copy()
+    (PyDict_Copy, faster than dict(record)), isinstance checks instead of
+    try/except, and str()/strip()/lower() only when a value misses the set."""
+    r = record.copy()
+
+    v = llm_data.get("relevance", 5)
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        try:
+            v = float(v)
+        except (TypeError, ValueError):
+            v = 5
+    # NaN/inf pass the isinstance check (stdlib json accepts the NaN
+    # literal) but int() on them raises — fall back to the default
+    if isinstance(v, float) and not math.isfinite(v):
+        v = 5
+    r["relevance"] = max(0, min(10, int(v)))
+
+    topic = llm_data.get("topic")
+    if not isinstance(topic, str) or topic not in VALID_TOPICS:
+        topic = str(topic).strip().lower()
+        if topic not in VALID_TOPICS:
+            topic = "general"
     if r["relevance"] < RELEVANCE_MIN:
-        r["topic"] = "irrelevant"
+        topic = "irrelevant"
+    r["topic"] = topic
 
-    sentiment = str(llm_data.get("llm_sentiment", "mixed")).strip().lower()
-    r["llm_sentiment"] = sentiment if sentiment in VALID_SENTIMENTS else "mixed"
+    sentiment = llm_data.get("llm_sentiment")
+    if not isinstance(sentiment, str) or sentiment not in VALID_SENTIMENTS:
+        sentiment = str(sentiment).strip().lower()
+        if sentiment not in VALID_SENTIMENTS:
+            sentiment = "mixed"
+    r["llm_sentiment"] = sentiment
 
     kp = llm_data.get("key_phrases", [])
     r["key_phrases"] = [str(p) for p in kp[:3]] if isinstance(kp, list) else []
 
-    r["is_critical"] = (r["topic"] == "bug_report" and r["llm_sentiment"] == "very_negative")
+    r["is_critical"] = (topic == "bug_report" and sentiment == "very_negative")
     return r
 
 
@@ -473,8 +1031,7 @@ def stage3_llm(all_records, meta, api_key, use_ollama):
     enriched_cache = {}
     if os.path.exists(ENRICHED_FILE):
         try:
-            with open(ENRICHED_FILE, encoding="utf-8") as f:
-                prev = json.load(f)
+            prev = _load_json(ENRICHED_FILE)
             for r in prev.get("records", []):
                 if r.get("id") and r.get("topic") and r.get("key_phrases"):
                     enriched_cache[r["id"]] = r
@@ -482,43 +1039,72 @@ def stage3_llm(all_records, meta, api_key, use_ollama):
         except Exception as e:
             print(f"  [Warning] Could not load cache: {e}")
 
-    # Split into cached vs new
+    # Split into cached vs new, remembering each unclassified record's slot in
+    # merged so enrichment can be written back in place
     merged = []
     to_classify = []
+    pos_by_id = {}
     for r in all_records:
         rid = r.get("id", "")
         if rid in enriched_cache:
             merged.append(enriched_cache[rid])
         else:
+            pos_by_id[rid] = len(merged)
             merged.append(r)
             to_classify.append(r)
 
     print(f"  Records to classify: {len(to_classify)}")
 
     if (use_ollama or api_key) and to_classify:
-        total_batches = (len(to_classify) + BATCH_SIZE - 1) // BATCH_SIZE
-        enriched_by_id = {}
-
-        for bn in range(total_batches):
-            batch = to_classify[bn * BATCH_SIZE:(bn + 1) * BATCH_SIZE]
-            print(f"    Batch {bn+1}/{total_batches} ({len(batch)} records)...", end=" ", flush=True)
-            try:
-                response = call_llm(build_batch_prompt(batch), api_key, use_ollama)
-                results  = parse_response(response, len(batch))
+        if use_ollama:
+            warm_ollama()
+        batches = [to_classify[i:i + BATCH_SIZE]
+                   for i in range(0, len(to_classify), BATCH_SIZE)]
+
+        try:
+            llm_cache = shelve.open(LLM_CACHE)
+        except Exception as e:
+            print(f"  [Warning] Could not open LLM cache: {e}")
+            llm_cache = {}   # in-process dedupe only for this run
+
+        if aiohttp is not None:
+            # Concurrent path: all batches in flight at once, gated by the
+            # semaphore inside classify_all. Serial latency becomes parallel.
+            all_results = asyncio.run(classify_all(batches, api_key, use_ollama, llm_cache))
+            for batch, results in zip(batches, all_results):
+                if isinstance(results, BaseException):
+                    print(f"    ✗ batch failed ({results})")
+                    results = []
                 for i, rec in enumerate(batch):
                     llm_data = results[i] if i < len(results) else {}
-                    enriched_by_id[rec["id"]] = safe_enrich(rec, llm_data)
-                print("✓")
-            except Exception as e:
-                print(f"✗ ({e})")
-                for rec in batch:
-                    enriched_by_id[rec["id"]] = safe_enrich(rec, {})
-
-            if bn < total_batches - 1:
-                time.sleep(RATE_LIMIT_S)
-
-        # Apply enrichment back
-        merged = [enriched_by_id.get(r.get("id"), r) for r in merged]
+                    merged[pos_by_id[rec["id"]]] = safe_enrich(rec, llm_data)
+        else:
+            total_batches = len(batches)
+            for bn, batch in enumerate(batches):
+                print(f"    Batch {bn+1}/{total_batches} ({len(batch)} records)...", end=" ", flush=True)
+                try:
+                    prompt = build_user_prompt(batch)
+                    key = _prompt_key(prompt, use_ollama)
+                    results = llm_cache.get(key)
+                    if results is None:
+                        response = call_llm(prompt, api_key, use_ollama)
+                        results  = parse_response(response, len(batch))
+                        if _cacheable(results, len(batch)):
+                            llm_cache[key] = results
+                    for i, rec in enumerate(batch):
+                        llm_data = results[i] if i < len(results) else {}
+                        merged[pos_by_id[rec["id"]]] = safe_enrich(rec, llm_data)
+                    print("✓")
+                except Exception as e:
+                    print(f"✗ ({e})")
+                    for rec in batch:
+                        merged[pos_by_id[rec["id"]]] = safe_enrich(rec, {})
+
+                if bn < total_batches - 1:
+                    time.sleep(RATE_LIMIT_S)
+
+        if hasattr(llm_cache, "close"):
+            llm_cache.close()
     elif not to_classify:
         print("  All records already classified — nothing to do.")
 
@@ -542,29 +1128,25 @@ def stage3_llm(all_records, meta, api_key, use_ollama):
         "critical_count":  critical_count,
     })
 
-    # Sort newest first
-    merged.sort(
-        key=lambda r: (r.get("created_utc") or r.get("created_at") or ""),
-        reverse=True,
-    )
+    # Sort newest first (same precomputed-key pattern as stage 2)
+    for r in merged:
+        r["_sortkey"] = r.get("created_utc") or r.get("created_at") or ""
+    merged.sort(key=operator.itemgetter("_sortkey"), reverse=True)
 
-    output = {"meta": meta, "records": merged}
+    output = {"meta": meta, "records": [_strip_private(r) for r in merged]}
 
     # Write mentions_enriched.json
-    with open(ENRICHED_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    _write_json(ENRICHED_FILE, output)
 
-    # Write data.js (dashboard reads this)
-    with open(DATA_JS, "w", encoding="utf-8") as f:
-        f.write("// Auto-generated by run_reddit_pipeline.py\n")
-        f.write("window.MATIKS_DATA = ")
-        json.dump(output, f, ensure_ascii=False)
-        f.write(";\n")
+    # Write data.js (dashboard reads this) — one buffered binary write; the
+    # payload bytes come straight from the serializer, no text-mode re-encode
+    with open(DATA_JS, "wb") as f:
+        f.write(b"// Auto-generated by run_reddit_pipeline.py\n"
+                b"window.MATIKS_DATA = " + _dumps_bytes(output) + b";\n")
 
     # Critical alerts
-    alerts = [r for r in merged if r.get("is_critical")]
-    with open(ALERTS_FILE, "w", encoding="utf-8") as f:
-        json.dump(alerts, f, ensure_ascii=False, indent=2)
+    alerts = [_strip_private(r) for r in merged if r.get("is_critical")]
+    _write_json(ALERTS_FILE, alerts)
 
     # Reddit summary
     reddit_enriched = [r for r in merged if r.get("platform") == "reddit"]
@@ -596,7 +1178,15 @@ if __name__ == "__main__":
     if not api_key or api_key == "your_gemini_api_key_here":
         api_key = None
 
-    use_ollama = check_ollama()
+    # Probe Ollama off-thread with a hard wall limit — a local daemon answers
+    # instantly or is not there, so the common Gemini-only case should not
+    # stall startup waiting on a connect timeout.
+    _probe = ThreadPoolExecutor(max_workers=1)
+    try:
+        use_ollama = _probe.submit(check_ollama).result(timeout=3)
+    except Exception:
+        use_ollama = False
+    _probe.shutdown(wait=False)
     if use_ollama:
         print(f"[LLM] Ollama reachable at {OLLAMA_URL} ✓")
     elif api_key:
@@ -14,8 +14,30 @@ import math
 import re
 import string
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Tuple
 
+try:
+    import numpy as np   # optional — vectorized BM25 scoring
+except ImportError:
+    np = None
+
+try:
+    from scipy import sparse as sp   # optional — batched cosine for dedup
+except ImportError:
+    sp = None
+
+# Fastest available Levenshtein: rapidfuzz (bit-parallel, supports an early
+# cutoff) > python-Levenshtein (C) > the pure-Python DP below
+try:
+    from rapidfuzz.distance import Levenshtein as _rf_levenshtein
+except ImportError:
+    _rf_levenshtein = None
+try:
+    import Levenshtein as _c_levenshtein
+except ImportError:
+    _c_levenshtein = None
+
 # ── BM25 constants ─────────────────────────────────────────────────────────────
 BM25_K1 = 1.5   # term saturation
 BM25_B  = 0.75  # length normalisation
@@ -33,104 +55,255 @@ BRAND_VARIANTS = [
     "matix", "mattics", "matks",
 ]
 
-STOPWORDS = {
+STOPWORDS = frozenset({
     "the", "a", "an", "is", "it", "in", "on", "at", "to", "for",
     "of", "and", "or", "but", "with", "this", "that", "are", "was",
     "be", "have", "has", "had", "not", "do", "does", "did", "will",
     "can", "i", "you", "he", "she", "we", "they", "my", "your",
     "its", "their", "so", "as", "by", "from", "up", "out", "if",
     "about", "than", "then", "just", "like", "more", "also",
-}
+})
 
 
 # ── Tokeniser ──────────────────────────────────────────────────────────────────
 
-def tokenise(text: str) -> List[str]:
-    text = text.lower()
-    # Replace punctuation with space to prevent "hello.world" -> "helloworld"
-    text = text.translate(str.maketrans(string.punctuation, " " * len(string.punctuation)))
-    return [w for w in text.split() if w and w not in STOPWORDS and len(w) > 1]
+# One compiled pattern extracts tokens directly — no translate/split pass,
+# and the regex already enforces length >= 2 so no per-token len check.
+# [^\W_] is any unicode letter or digit: apostrophes split tokens (so
+# "matiks's" still yields "matiks") and accented words survive intact,
+# matching the old punctuation-translate behaviour.
+_TOKEN_RE = re.compile(r"[^\W_]{2,}")
+
+
+def tokenise(text: str, already_lower: bool = False) -> List[str]:
+    if not already_lower:
+        text = text.lower()
+    return [w for w in _TOKEN_RE.findall(text) if w not in STOPWORDS]
+
+
+# ── Corpus statistics ──────────────────────────────────────────────────────────
+
+def build_corpus_stats(tokens: List[List[str]]) -> Tuple[Dict[str, int], List[int], List[Counter]]:
+    """Return (df, doc_lens, tf_counters) for a tokenised corpus.
+
+    BM25 and the TF-IDF dedup need the same per-document counters and
+    document frequencies; building them here once lets both consumers share
+    a single corpus pass instead of each rescanning every document."""
+    tfs: List[Counter] = [Counter(doc) for doc in tokens]
+    doc_lens: List[int] = [len(doc) for doc in tokens]
+    df: Dict[str, int] = defaultdict(int)
+    for tf in tfs:
+        for term in tf:
+            df[term] += 1
+    return df, doc_lens, tfs
 
 
 # ── BM25 ───────────────────────────────────────────────────────────────────────
 
 class BM25:
-    def __init__(self, corpus: List[List[str]]):
+    def __init__(self, corpus: List[List[str]],
+                 stats: Tuple[Dict[str, int], List[int], List[Counter]] = None):
         self.n = len(corpus)
-        self.avgdl = sum(len(d) for d in corpus) / max(self.n, 1)
-        self.df: Dict[str, int] = defaultdict(int)
         self.corpus = corpus
 
-        for doc in corpus:
-            for term in set(doc):
-                self.df[term] += 1
+        # Term frequencies, lengths and df are per-corpus constants — take
+        # them from the caller when already computed, build them once here
+        # otherwise, so scoring never reconstructs a Counter
+        if stats is None:
+            stats = build_corpus_stats(corpus)
+        self.df, self.doc_lens, self.tfs = stats
+        self.avgdl = sum(self.doc_lens) / max(self.n, 1)
+
+        # IDF depends only on the term, so compute it once here instead of
+        # one math.log per (query term, document) pair during scoring
+        self.idf: Dict[str, float] = {
+            term: math.log((self.n - df + 0.5) / (df + 0.5) + 1)
+            for term, df in self.df.items()
+        }
+
+        # With numpy, keep per-term postings arrays (doc indices + counts)
+        # and the precomputed length-normalisation term, so scoring the whole
+        # corpus is a handful of array ops per query term instead of a Python
+        # loop over every document
+        if np is not None:
+            doc_lens = np.array(self.doc_lens, dtype=np.float64)
+            self._denom_base = BM25_K1 * (
+                1 - BM25_B + BM25_B * doc_lens / max(self.avgdl, 1e-9)
+            )
+            postings: Dict[str, Tuple[list, list]] = {}
+            for i, tf in enumerate(self.tfs):
+                for term, count in tf.items():
+                    entry = postings.setdefault(term, ([], []))
+                    entry[0].append(i)
+                    entry[1].append(count)
+            self._postings = {
+                term: (np.asarray(ix, dtype=np.int32),
+                       np.asarray(counts, dtype=np.float64))
+                for term, (ix, counts) in postings.items()
+            }
 
     def score(self, query_tokens: List[str], doc_tokens: List[str]) -> float:
-        tf = Counter(doc_tokens)
-        dl = len(doc_tokens)
+        return self._score(
+            [(t, self.idf[t]) for t in query_tokens if t in self.idf],
+            Counter(doc_tokens), len(doc_tokens),
+        )
+
+    def _score(self, q_idf: List[Tuple[str, float]], tf: Counter, dl: int) -> float:
+        # The length normalisation depends only on the document, so compute
+        # it once per doc instead of once per query term; absent terms add
+        # nothing and are skipped before any arithmetic
+        k_dl = BM25_K1 * (1 - BM25_B + BM25_B * dl / self.avgdl)
+        k1_plus_1 = BM25_K1 + 1
         score = 0.0
-        for term in query_tokens:
-            if term not in self.df:
-                continue
-            idf = math.log((self.n - self.df[term] + 0.5) / (self.df[term] + 0.5) + 1)
+        for term, idf in q_idf:
             freq = tf[term]
-            numerator = freq * (BM25_K1 + 1)
-            denominator = freq + BM25_K1 * (1 - BM25_B + BM25_B * dl / self.avgdl)
-            score += idf * (numerator / denominator)
-        return round(score, 4)
+            if freq:
+                score += idf * freq * k1_plus_1 / (freq + k_dl)
+        return score
 
     def score_all(self, query_tokens: List[str]) -> List[float]:
-        return [self.score(query_tokens, doc) for doc in self.corpus]
+        if np is not None:
+            # Sparse accumulation: only the documents that actually contain a
+            # query term are touched, and each term is one vectorized update
+            scores = np.zeros(self.n)
+            for term in query_tokens:
+                idf = self.idf.get(term)
+                if idf is None:
+                    continue
+                ix, freq = self._postings[term]
+                scores[ix] += idf * freq * (BM25_K1 + 1) / (freq + self._denom_base[ix])
+            return scores.tolist()
+
+        # Resolve the query terms' IDF once for the whole corpus pass;
+        # per-doc TF counters and lengths were cached at construction
+        q_idf = [(t, self.idf[t]) for t in query_tokens if t in self.idf]
+        return [self._score(q_idf, self.tfs[i], self.doc_lens[i])
+                for i in range(self.n)]
 
 
 # ── TF-IDF cosine similarity (for deduplication) ──────────────────────────────
 
-def build_tfidf_vectors(docs: List[List[str]]) -> Tuple[List[Dict[str, float]], Dict[str, float]]:
-    """Return (tfidf_vectors, idf_map)."""
+def build_tfidf_vectors(docs: List[List[str]],
+                        stats: Tuple[Dict[str, int], List[int], List[Counter]] = None
+                        ) -> Tuple[List[Dict[str, float]], Dict[str, float], List[float]]:
+    """Return (tfidf_vectors, idf_map, norms). Each vector's magnitude is
+    computed here once — the pairwise loop would otherwise redo both square
+    roots on every comparison, touching each norm O(N) times instead of once.
+    Callers with corpus stats in hand (enrich_with_search_scores) pass them
+    in so df and the per-doc counters aren't rebuilt."""
     n = len(docs)
-    df: Dict[str, int] = defaultdict(int)
-    for doc in docs:
-        for term in set(doc):
-            df[term] += 1
+    if stats is None:
+        stats = build_corpus_stats(docs)
+    df, doc_lens, tfs = stats
 
     idf = {term: math.log((n + 1) / (count + 1)) for term, count in df.items()}
 
     vectors = []
-    for doc in docs:
-        tf = Counter(doc)
-        dl = len(doc)
+    norms = []
+    for tf, dl in zip(tfs, doc_lens):
         vec = {term: (count / max(dl, 1)) * idf.get(term, 0) for term, count in tf.items()}
         vectors.append(vec)
+        norms.append(math.sqrt(sum(x * x for x in vec.values())))
 
-    return vectors, idf
+    return vectors, idf, norms
 
 
-def cosine_sim(v1: Dict[str, float], v2: Dict[str, float]) -> float:
+def cosine_sim(v1: Dict[str, float], v2: Dict[str, float],
+               n1: float, n2: float) -> float:
     common = set(v1) & set(v2)
     if not common:
         return 0.0
     dot = sum(v1[k] * v2[k] for k in common)
-    mag1 = math.sqrt(sum(x ** 2 for x in v1.values()))
-    mag2 = math.sqrt(sum(x ** 2 for x in v2.values()))
-    return dot / (mag1 * mag2 + 1e-9)
-
-
-def find_near_duplicates(records: List[dict], threshold: float = 0.85) -> List[str]:
-    """Return list of record IDs that are near-duplicates of an earlier record."""
-    texts = [get_text(r) for r in records]
-    tokenised = [tokenise(t) for t in texts]
-    vectors, _ = build_tfidf_vectors(tokenised)
-
+    return dot / (n1 * n2 + 1e-9)
+
+
+def find_near_duplicates(records: List[dict], threshold: float = 0.85,
+                         tokenised: List[List[str]] = None,
+                         candidate_idx: List[int] = None,
+                         stats: Tuple[Dict[str, int], List[int], List[Counter]] = None
+                         ) -> List[str]:
+    """Return list of record IDs that are near-duplicates of an earlier record.
+
+    Callers that already tokenised the records (enrich_with_search_scores)
+    pass the result — and the corpus stats — in so the corpus isn't scanned
+    twice. candidate_idx restricts the pairwise comparisons to those records
+    (ascending indices) while TF-IDF statistics stay corpus-wide."""
+    if tokenised is None:
+        tokenised = [tokenise(get_text(r)) for r in records]
+    vectors, _, norms = build_tfidf_vectors(tokenised, stats=stats)
+    n = len(vectors)
+    indices = list(candidate_idx) if candidate_idx is not None else list(range(n))
+
+    if sp is not None and np is not None and indices:
+        # Batched path: pack the vectors into an L2-normalised CSR matrix so
+        # X @ X.T is the entire cosine matrix in one sparse multiply, then
+        # walk only the upper-triangle entries that clear the threshold
+        term_col: Dict[str, int] = {}
+        rows, cols, vals = [], [], []
+        for local_i, i in enumerate(indices):
+            inv = 1.0 / (norms[i] + 1e-9)
+            for term, w in vectors[i].items():
+                col = term_col.setdefault(term, len(term_col))
+                rows.append(local_i)
+                cols.append(col)
+                vals.append(w * inv)
+        X = sp.csr_matrix((vals, (rows, cols)),
+                          shape=(len(indices), len(term_col) or 1))
+        sims = sp.triu(X @ X.T, k=1).tocoo()
+
+        platforms = [r.get("platform") for r in records]
+        duplicates = set()
+        # Row-major order so the earlier record of each pair is always kept
+        for k in np.lexsort((sims.col, sims.row)):
+            if sims.data[k] < threshold:
+                continue
+            i, j = indices[int(sims.row[k])], indices[int(sims.col[k])]
+            # Only deduplicate within the same platform
+            if (platforms[i] == platforms[j]
+                    and records[i]["id"] not in duplicates
+                    and records[j]["id"] not in duplicates):
+                duplicates.add(records[j]["id"])
+        return list(duplicates)
+
+    token_sets = [set(d) for d in tokenised]
+
+    # Only same-platform pairs can be duplicates (cross-platform reposts are
+    # ok), so partition first and never generate cross-platform candidates
+    buckets: Dict[str, List[int]] = defaultdict(list)
+    for i in indices:
+        buckets[records[i].get("platform")].append(i)
+
+    # Inverted-index blocking: near-duplicates at this threshold necessarily
+    # share a non-ubiquitous term, so only pairs that co-occur in some posting
+    # list ever get a cosine — near-linear in N instead of all N²/2 pairs.
+    # Terms in more than ~10% of records are useless for blocking and skipped.
+    df_cap = max(5, n // 10)
     duplicates = set()
-    for i in range(len(vectors)):
-        if records[i]["id"] in duplicates:
-            continue
-        for j in range(i + 1, len(vectors)):
-            if records[j]["id"] in duplicates:
+    for bucket in buckets.values():
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for i in bucket:
+            for term in token_sets[i]:
+                postings[term].append(i)
+
+        for i in bucket:
+            if records[i]["id"] in duplicates:
                 continue
-            # Only deduplicate within the same platform (cross-platform reposts are ok)
-            if records[i].get("platform") == records[j].get("platform"):
-                sim = cosine_sim(vectors[i], vectors[j])
+            candidates = set()
+            # Rarest-first, and always block on the document's few rarest
+            # terms even above the df cap — a short post made entirely of
+            # corpus-common words would otherwise get no candidates at all
+            # and its exact duplicates would be missed
+            for rank, term in enumerate(sorted(token_sets[i],
+                                               key=lambda t: len(postings[t]))):
+                plist = postings[term]
+                if rank >= 3 and len(plist) > df_cap:
+                    break
+                candidates.update(plist)
+            # Sorted so the earlier record is always the one kept
+            for j in sorted(candidates):
+                if j <= i or records[j]["id"] in duplicates:
+                    continue
+                sim = cosine_sim(vectors[i], vectors[j], norms[i], norms[j])
                 if sim >= threshold:
                     duplicates.add(records[j]["id"])  # keep the earlier one
     return list(duplicates)
@@ -139,29 +312,79 @@ def find_near_duplicates(records: List[dict], threshold: float = 0.85) -> List[s
 # ── Fuzzy matching ─────────────────────────────────────────────────────────────
 
 def fuzzy_distance(a: str, b: str) -> int:
-    """Basic Levenshtein distance (no external library needed)."""
+    """Levenshtein distance — native implementation when one is installed,
+    two-row DP (no full matrix allocation) otherwise."""
+    if _rf_levenshtein is not None:
+        return _rf_levenshtein.distance(a, b)
+    if _c_levenshtein is not None:
+        return _c_levenshtein.distance(a, b)
     la, lb = len(a), len(b)
-    dp = [[0] * (lb + 1) for _ in range(la + 1)]
-    for i in range(la + 1):
-        dp[i][0] = i
-    for j in range(lb + 1):
-        dp[0][j] = j
+    prev = list(range(lb + 1))
     for i in range(1, la + 1):
+        curr = [i] + [0] * lb
+        ca = a[i - 1]
         for j in range(1, lb + 1):
-            cost = 0 if a[i - 1] == b[j - 1] else 1
-            dp[i][j] = min(dp[i-1][j] + 1, dp[i][j-1] + 1, dp[i-1][j-1] + cost)
-    return dp[la][lb]
+            cost = 0 if ca == b[j - 1] else 1
+            curr[j] = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + cost)
+        prev = curr
+    return prev[lb]
+
+
+def _edit1_neighborhood(word: str) -> set:
+    """All strings exactly one insert/delete/substitute away from word."""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = {a + b[1:] for a, b in splits if b}
+    subs = {a + c + b[1:] for a, b in splits if b for c in string.ascii_lowercase}
+    inserts = {a + c + b for a, b in splits for c in string.ascii_lowercase}
+    return deletes | subs | inserts
+
+
+# Variants bucketed by length: a word can only match variants whose length
+# is within max_distance of its own, so incompatible ones are never iterated
+_BRAND_BY_LEN: Dict[int, List[str]] = defaultdict(list)
+for _v in BRAND_VARIANTS:
+    _BRAND_BY_LEN[len(_v)].append(_v)
+
+
+# Every string within one edit of a brand variant (~3k strings, built once).
+# The default max_distance=1 check then needs one hash lookup per word — no
+# edit-distance computation at all, and no word x variant loop.
+_VARIANTS_EDIT1 = frozenset(BRAND_VARIANTS).union(
+    *(_edit1_neighborhood(v) for v in BRAND_VARIANTS)
+)
+
+
+def _within_distance(word: str, variant: str, max_distance: int) -> bool:
+    if _rf_levenshtein is not None:
+        # score_cutoff short-circuits the moment the bound is exceeded
+        return _rf_levenshtein.distance(word, variant,
+                                        score_cutoff=max_distance) <= max_distance
+    return fuzzy_distance(word, variant) <= max_distance
+
+
+def _scan_variants(word: str, max_distance: int) -> bool:
+    wl = len(word)
+    for length in range(wl - max_distance, wl + max_distance + 1):
+        for variant in _BRAND_BY_LEN.get(length, ()):
+            if _within_distance(word, variant, max_distance):
+                return True
+    return False
 
 
 def fuzzy_contains_brand(text: str, max_distance: int = 1) -> bool:
     """Return True if text contains a brand variant within max_distance edits."""
     words = re.findall(r'\b\w{4,}\b', text.lower())
-    for word in words:
-        for variant in BRAND_VARIANTS:
-            if abs(len(word) - len(variant)) <= max_distance:
-                if fuzzy_distance(word, variant) <= max_distance:
-                    return True
-    return False
+    if max_distance == 1:
+        for word in words:
+            if word in _VARIANTS_EDIT1:
+                return True
+            # The neighborhood only enumerates lowercase-letter edits;
+            # words with digits or accents ("mat1ks") still get a real
+            # distance check so leetspeak misspellings aren't lost
+            if not (word.isascii() and word.isalpha()) and _scan_variants(word, 1):
+                return True
+        return False
+    return any(_scan_variants(word, max_distance) for word in words)
 
 
 # ── Co-occurrence analysis ─────────────────────────────────────────────────────
@@ -171,19 +394,20 @@ def compute_cooccurrence(records: List[dict], top_n: int = 50) -> List[Dict]:
     Find the top_n words that co-occur with 'matiks' across all records.
     Used to generate the dashboard word cloud.
     """
-    word_count: Dict[str, int] = defaultdict(int)
+    word_count: Counter = Counter()
 
     for r in records:
         text = get_text(r).lower()
         if "matiks" not in text:
             continue
-        tokens = tokenise(text)
-        for token in tokens:
-            if token != "matiks" and len(token) > 3:
-                word_count[token] += 1
+        # Already lowercased for the gate above — don't re-lowercase, and let
+        # Counter.update run the counting loop in C
+        word_count.update(
+            [t for t in tokenise(text, already_lower=True)
+             if t != "matiks" and len(t) > 3]
+        )
 
-    sorted_words = sorted(word_count.items(), key=lambda x: -x[1])[:top_n]
-    return [{"word": w, "count": c} for w, c in sorted_words]
+    return [{"word": w, "count": c} for w, c in word_count.most_common(top_n)]
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
@@ -209,19 +433,37 @@ def enrich_with_search_scores(records: List[dict]) -> List[dict]:
     texts = [get_text(r) for r in records]
     tokenised = [tokenise(t) for t in texts]
 
-    # BM25 scoring
-    bm25 = BM25(tokenised)
+    # One corpus pass covers BM25 and the TF-IDF dedup below
+    stats = build_corpus_stats(tokenised)
+
+    bm25 = BM25(tokenised, stats=stats)
     query_tokens = tokenise(MATIKS_REFERENCE)
+    # BM25 first (it's the cheap, vectorized stage) so its scores can gate
+    # the expensive ones: a record scoring 0 against the reference query
+    # shares no term with it and can't be a brand-relevant duplicate.
     scores = bm25.score_all(query_tokens)
 
-    # Near-duplicate detection
-    duplicate_ids = set(find_near_duplicates(records))
+    candidate_idx = [i for i, s in enumerate(scores)
+                     if s > 0 or "matiks" in texts[i].lower()]
+
+    # Dedup (candidates only) runs on a worker while the per-record fuzzy
+    # checks — embarrassingly parallel, C-bound when a native Levenshtein is
+    # installed — fan out across the remaining workers. Fuzzy still covers
+    # every record: it exists to rescue misspellings BM25 can't see.
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        dups_future = executor.submit(find_near_duplicates, records,
+                                      tokenised=tokenised,
+                                      candidate_idx=candidate_idx,
+                                      stats=stats)
+        fuzzy_flags = list(executor.map(fuzzy_contains_brand, texts))
+        duplicate_ids = set(dups_future.result())
 
-    # Apply scores
     for i, record in enumerate(records):
-        record["bm25_score"] = scores[i]
+        # Scores stay full-precision floats inside BM25; round only here,
+        # where they become JSON output
+        record["bm25_score"] = round(scores[i], 4)
         record["is_near_duplicate"] = record["id"] in duplicate_ids
-        record["fuzzy_brand_match"] = fuzzy_contains_brand(get_text(record))
+        record["fuzzy_brand_match"] = fuzzy_flags[i]
 
     return records
 
@@ -15,14 +15,21 @@ Without credentials, twscrape uses guest tokens (lower limits, may be blocked
 more easily). The scraper gracefully writes an empty file on any failure so
 the rest of the pipeline always continues.
 
-Output: data/twitter_raw.json
+Output: data/twitter_raw.jsonl
 """
 import asyncio
 import json
 import os
+import re
 from datetime import datetime, timedelta
 
-OUTPUT_FILE = "/data/data/twitter_raw.json"
+try:
+    import orjson   # optional — C-backed JSON, writes/reads bytes directly
+except ImportError:
+    orjson = None
+
+OUTPUT_FILE  = "/data/data/twitter_raw.json"    # legacy layout
+OUTPUT_JSONL = "/data/data/twitter_raw.jsonl"
 CONFIG_FILE  = "/data/config.env"
 QUERY       = "Matiks"
 DAYS_BACK   = 7
@@ -35,6 +42,9 @@ BLOCKLIST = {
     "motorcycle", "scooter", "honda", "yamaha", "kawasaki",
 }
 
+# One compiled alternation — a single C-level scan instead of N substring checks
+BLOCK_RE = re.compile("|".join(re.escape(w) for w in BLOCKLIST))
+
 
 def load_config() -> dict:
     config = {}
@@ -48,13 +58,43 @@ def load_config() -> dict:
     return config
 
 
-def load_existing(path):
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except Exception:
-                return []
+def _loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def _dumps_bytes(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _append_jsonl(path, records):
+    """Append records one-per-line — O(new tweets) per run, not O(history)."""
+    with open(path, "ab") as f:
+        for r in records:
+            f.write(_dumps_bytes(r) + b"\n")
+
+
+def load_existing():
+    if os.path.exists(OUTPUT_JSONL):
+        try:
+            with open(OUTPUT_JSONL, "rb") as f:
+                return [_loads(line) for line in f if line.strip()]
+        except Exception:
+            return []
+    if os.path.exists(OUTPUT_FILE):
+        # One-time migration from the legacy whole-array twitter_raw.json
+        try:
+            with open(OUTPUT_FILE, "rb") as f:
+                records = _loads(f.read())
+        except Exception:
+            return []
+        _append_jsonl(OUTPUT_JSONL, records)
+        return records
     return []
 
 
@@ -63,9 +103,7 @@ def is_relevant(text: str) -> bool:
     text_lower = text.lower()
     if "matiks" not in text_lower:
         return False
-    if any(w in text_lower for w in BLOCKLIST):
-        return False
-    return True
+    return BLOCK_RE.search(text_lower) is None
 
 
 async def scrape_async():
@@ -77,7 +115,7 @@ async def scrape_async():
         print("[Twitter/X] twscrape not installed. Run: pip install twscrape")
         return [], []
 
-    existing     = load_existing(OUTPUT_FILE)
+    existing     = load_existing()
     existing_ids = {r["id"] for r in existing}
     config       = load_config()
 
@@ -146,11 +184,11 @@ def scrape():
         all_records, new_records = asyncio.run(scrape_async())
     except Exception as e:
         print(f"[Twitter/X] Fatal error: {e}")
-        all_records = load_existing(OUTPUT_FILE)
+        all_records = load_existing()
         new_records = []
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_records, f, ensure_ascii=False, indent=2)
+    # Append only this run's tweets — the history is already on disk
+    _append_jsonl(OUTPUT_JSONL, new_records)
 
     print(f"[Twitter/X] Done. New: {len(new_records)}, Total: {len(all_records)}")
 